@@ -1,5 +1,7 @@
 import enum
 import hashlib
+from functools import lru_cache
+from typing import Iterable, List, NamedTuple, Optional, Tuple
 
 """
 https://sawtooth.hyperledger.org/docs/core/releases/latest/app_developers_guide/address_and_namespace.html
@@ -24,8 +26,17 @@ RECORD_TYPE_PREFIX: str = 'ee'
 
 RECORD_TYPE_ADDRESS_RANGE = NAMESPACE + RECORD_TYPE_PREFIX
 
+# Number of identifier hashes and of addresses of each kind kept by the LRU caches below
+ADDRESS_CACHE_SIZE = 2 ** 14
+
+
+def _sha512(identifier: str) -> str:
+    return hashlib.sha512(identifier.encode('utf-8')).hexdigest()
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
 def _hash(identifier: str) -> str:
-    return hashlib.sha512(identifier.encode()).hexdigest()
+    return _sha512(identifier)
 
 
 @enum.unique
@@ -40,54 +51,93 @@ class AddressSpace(enum.IntEnum):
     OTHER_FAMILY: int = 100
 
 
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
 def get_agent_address(public_key: str) -> str:
-    return NAMESPACE + AGENT_PREFIX + hashlib.sha512(
-        public_key.encode('utf-8')).hexdigest()[:62]
+    return NAMESPACE + AGENT_PREFIX + _sha512(public_key)[:62]
 
 
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
 def get_record_address(record_id: str) -> str:
-    return NAMESPACE + RECORD_PREFIX + hashlib.sha512(
-        record_id.encode('utf-8')).hexdigest()[:62]
+    return NAMESPACE + RECORD_PREFIX + _sha512(record_id)[:62]
 
 
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
 def get_record_type_address(type_name: str) -> str:
-    return NAMESPACE + RECORD_TYPE_PREFIX + hashlib.sha512(
-        type_name.encode('utf-8')).hexdigest()[:62]
+    return NAMESPACE + RECORD_TYPE_PREFIX + _sha512(type_name)[:62]
 
 
 def get_property_address(record_id: str, property_name: str, page: int = 0) -> str:
-    return make_property_address_range(record_id) + _hash(property_name)[:22] + num_to_page_number(page)
+    return make_property_prefix(record_id, property_name) + num_to_page_number(page)
+
+
+def get_property_addresses(properties: Iterable[Tuple[str, str, int]]) -> List[str]:
+    """ Returns the address of every (record_id, property_name, page), in order. Every record id and property name
+        is hashed once per call, and the hashes do not displace the entries of the LRU caches. """
+    record_ranges, property_hashes = {}, {}
+    addresses = []
+    for record_id, property_name, page in properties:
+        record_range = record_ranges.get(record_id)
+        if record_range is None:
+            record_range = record_ranges[record_id] = NAMESPACE + PROPERTY_PREFIX + _sha512(record_id)[:36]
+        property_hash = property_hashes.get(property_name)
+        if property_hash is None:
+            property_hash = property_hashes[property_name] = _sha512(property_name)[:22]
+        addresses.append(record_range + property_hash + num_to_page_number(page))
+    return addresses
 
 
 def num_to_page_number(record_id) -> str:
-    return '{0:0{1}x}'.format(int(record_id), 4)
+    return format(int(record_id), '04x')
 
 
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
 def make_property_address_range(record_id) -> str:
-    return NAMESPACE + PROPERTY_PREFIX + _hash(record_id)[:36]
+    return NAMESPACE + PROPERTY_PREFIX + _sha512(record_id)[:36]
+
+
+@lru_cache(maxsize=ADDRESS_CACHE_SIZE)
+def make_property_prefix(record_id, property_name) -> str:
+    """ The address prefix shared by a property and all of its pages """
+    return make_property_address_range(record_id) + _hash(property_name)[:22]
 
 
 def make_proposal_address(record_id, agent_id) -> str:
     return NAMESPACE + PROPOSAL_PREFIX + _hash(record_id)[:36] + _hash(agent_id)[:26]
 
 
+class ParsedAddress(NamedTuple):
+    """ What an address holds. record_range is the property address range of the record (see
+        make_property_address_range) and page the page number; both are None for anything but properties. """
+    address_type: AddressSpace
+    record_range: Optional[str] = None
+    page: Optional[int] = None
+
+
+_PREFIX_LENGTH = len(NAMESPACE) + len(AGENT_PREFIX)
+_RECORD_RANGE_LENGTH = _PREFIX_LENGTH + 36
+
+_ADDRESS_TYPES = {
+    NAMESPACE + AGENT_PREFIX: AddressSpace.AGENT,
+    NAMESPACE + RECORD_PREFIX: AddressSpace.RECORD,
+    NAMESPACE + PROPERTY_PREFIX: AddressSpace.PROPERTY,
+    NAMESPACE + PROPOSAL_PREFIX: AddressSpace.PROPOSAL,
+    NAMESPACE + RECORD_TYPE_PREFIX: AddressSpace.RECORD_TYPE,
+}
+
+
+def parse_address(address: str) -> ParsedAddress:
+    address_type = _ADDRESS_TYPES.get(address[:_PREFIX_LENGTH], AddressSpace.OTHER_FAMILY)
+    if address_type is not AddressSpace.PROPERTY:
+        return ParsedAddress(address_type)
+
+    page = int(address[-4:], 16)
+    return ParsedAddress(AddressSpace.PROPERTY_PAGE if page else AddressSpace.PROPERTY,
+                         address[:_RECORD_RANGE_LENGTH], page)
+
+
+def parse_addresses(addresses: Iterable[str]) -> List[ParsedAddress]:
+    return [parse_address(address) for address in addresses]
+
+
 def get_address_type(address) -> int:
-    if address[:len(NAMESPACE)] != NAMESPACE:
-        return AddressSpace.OTHER_FAMILY
-
-    infix = address[6:8]
-
-    if infix == AGENT_PREFIX:
-        return AddressSpace.AGENT
-    if infix == RECORD_PREFIX:
-        return AddressSpace.RECORD
-    if infix == PROPERTY_PREFIX:
-        if address[-4:] == "0000":
-            return AddressSpace.PROPERTY
-        else:
-            return AddressSpace.PROPERTY_PAGE
-    if infix == PROPOSAL_PREFIX:
-        return AddressSpace.PROPOSAL
-    if infix == RECORD_TYPE_PREFIX:
-        return AddressSpace.RECORD_TYPE
-    return AddressSpace.OTHER_FAMILY
+    return parse_address(address).address_type
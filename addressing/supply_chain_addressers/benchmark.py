@@ -0,0 +1,56 @@
+""" Compares per-call and batch derivation of property addresses.
+
+Usage: python -m addressing.supply_chain_addressers.benchmark [-r RECORDS] [-p PROPERTIES] [--pages PAGES]
+Derives the address of every page of every property of every record, as the transaction processor and the
+client do when creating and updating records.
+"""
+import argparse
+import timeit
+from uuid import uuid4
+
+from addressing.supply_chain_addressers import addresser
+
+
+def _uncached(record_id, property_name, page):
+    return (addresser.NAMESPACE + addresser.PROPERTY_PREFIX + addresser._sha512(record_id)[:36] +
+            addresser._sha512(property_name)[:22] + addresser.num_to_page_number(page))
+
+
+def _clear_caches():
+    addresser._hash.cache_clear()
+    addresser.make_property_address_range.cache_clear()
+    addresser.make_property_prefix.cache_clear()
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmarks property address derivation.")
+    parser.add_argument("-r", "--records", type=int, default=1000, help="Number of records")
+    parser.add_argument("-p", "--properties", type=int, default=5, help="Number of properties per record")
+    parser.add_argument("--pages", type=int, default=2, help="Number of pages per property")
+    parser.add_argument("-n", "--number", type=int, default=5, help="Timed runs per method")
+    args = parser.parse_args(args)
+
+    record_ids = [uuid4().hex for _ in range(args.records)]
+    property_names = [f"property_{i}" for i in range(args.properties)]
+    keys = [(record_id, name, page)
+            for record_id in record_ids for name in property_names for page in range(args.pages)]
+
+    def cold():
+        _clear_caches()
+        return [addresser.get_property_address(*key) for key in keys]
+
+    methods = [
+        ("uncached", lambda: [_uncached(*key) for key in keys]),
+        ("cached, cold", cold),
+        ("cached, warm", lambda: [addresser.get_property_address(*key) for key in keys]),
+        ("batch", lambda: addresser.get_property_addresses(keys)),
+    ]
+
+    print(f"{len(keys)} addresses per run")
+    for name, method in methods:
+        seconds = min(timeit.repeat(method, number=1, repeat=args.number))
+        print(f"{name:>14}: {seconds * 1000:8.2f} ms  {len(keys) / seconds:12.0f} addresses/s")
+
+
+if __name__ == "__main__":
+    main()
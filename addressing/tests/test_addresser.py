@@ -26,8 +26,7 @@ class AddresserTest(unittest.TestCase):
 
     def test_property_address(self):
         property_name = uuid4().hex
-        record_address = addresser.get_record_address(uuid4().hex)
-        property_address = addresser.make_property_address(record_address, property_name, 0)
+        property_address = addresser.get_property_address(uuid4().hex, property_name, 0)
 
         self.assertEqual(len(property_address), 70, "The address is valid.")
 
@@ -54,3 +53,53 @@ class AddresserTest(unittest.TestCase):
         self.assertEqual(addresser.get_address_type(record_type),
                          addresser.AddressSpace.RECORD_TYPE,
                          "The address is correctly identified as an Record type.")
+
+    def test_property_addresses(self):
+        record_ids = [uuid4().hex for _ in range(3)]
+        keys = [(record_id, name, page) for record_id in record_ids for name in ("a", "b") for page in (0, 1, 300)]
+
+        self.assertEqual(addresser.get_property_addresses(keys),
+                         [addresser.get_property_address(*key) for key in keys],
+                         "Batch derivation gives the same addresses, in order.")
+
+        self.assertEqual(addresser.get_address_type(addresser.get_property_addresses(keys)[1]),
+                         addresser.AddressSpace.PROPERTY_PAGE,
+                         "The address is correctly identified as a PROPERTY_PAGE.")
+
+    def test_cached_address(self):
+        record_id = uuid4().hex
+        property_address = addresser.get_property_address(record_id, "temperature", 2)
+
+        self.assertEqual(addresser.get_property_address(record_id, "temperature", 2), property_address,
+                         "Repeated calls give the same address.")
+
+        self.assertEqual(property_address[:6 + 2 + 36],
+                         addresser.make_property_address_range(record_id),
+                         "The address starts with the property address range of its record.")
+
+    def test_parse_address(self):
+        record_id = uuid4().hex
+        page_address = addresser.get_property_address(record_id, "temperature", 258)
+        parsed = addresser.parse_address(page_address)
+
+        self.assertEqual(parsed.address_type, addresser.AddressSpace.PROPERTY_PAGE,
+                         "The address is correctly identified as a PROPERTY_PAGE.")
+        self.assertEqual(parsed.record_range, addresser.make_property_address_range(record_id),
+                         "The record range is the property address range of the record.")
+        self.assertEqual(parsed.page, 258, "The page number is decoded.")
+
+        self.assertEqual(addresser.parse_address(addresser.get_property_address(record_id, "temperature")),
+                         (addresser.AddressSpace.PROPERTY, parsed.record_range, 0),
+                         "Page 0 is the property itself.")
+
+    def test_parse_addresses(self):
+        addresses = [addresser.get_agent_address(uuid4().hex),
+                     addresser.get_record_type_address(uuid4().hex),
+                     '000000' + addresser.AGENT_PREFIX + '0' * 62]
+
+        self.assertEqual([p.address_type for p in addresser.parse_addresses(addresses)],
+                         [addresser.AddressSpace.AGENT,
+                          addresser.AddressSpace.RECORD_TYPE,
+                          addresser.AddressSpace.OTHER_FAMILY],
+                         "Every address is classified, in order.")
+        self.assertIsNone(addresser.parse_addresses(addresses)[0].page, "Only properties have pages.")
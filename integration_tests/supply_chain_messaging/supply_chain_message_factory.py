@@ -130,18 +130,23 @@ class SupplyChainMessageFactory:
         )
 
         record_address = addressing.get_record_address(record_id)
-        property_address_range = \
-            addressing.make_property_address_range(record_id)
+
+        # Each property's prefix covers the property and all of its
+        # pages, so updates of different properties do not conflict
+        property_prefixes = [
+            addressing.make_property_prefix(record_id, name)
+            for name in properties_dict
+        ]
 
         inputs = [
             record_address,
-            property_address_range,
+            *property_prefixes,
         ]
 
         return self._create_transaction(
             payload,
             inputs=inputs,
-            outputs=[property_address_range]
+            outputs=property_prefixes
         )
 
     def create_proposal(self, record_id, receiving_agent,
@@ -223,7 +228,7 @@ class SupplyChainMessageFactory:
             record_id, reporter_id)
 
         property_addresses = [
-            addressing.make_property_address(
+            addressing.get_property_address(
                 record_id, property_name)
             for property_name in properties
         ]
@@ -0,0 +1,87 @@
+"""Loads the current state of the supply chain namespace into an empty
+database from the REST API, so that a new replica does not have to replay
+every block since genesis.
+
+All state is read at one block, and written as if it had been created in
+that block. Afterwards, the Subscriber is started with that block as the
+last known block, so deltas continue right after it. The block is taken a
+number of confirmations behind the head: if it were later dropped in a
+fork, the validator would not know it, and the Subscriber would fall back
+to replaying every block on top of the snapshot.
+"""
+import base64
+import json
+import logging
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+from addressing.supply_chain_addressers.addresser import NAMESPACE, parse_addresses
+from ledger_sync.deltas.decoding import data_to_dicts
+from ledger_sync.deltas.updating import BlockWritePlan
+
+LOGGER = logging.getLogger(__name__)
+
+# Entries per /state page; the REST API does not return more than 1000
+STATE_PAGE_LIMIT = 1000
+
+# Blocks between the head and the block the state is read at
+DEFAULT_CONFIRMATIONS = 10
+
+
+def bootstrap(database, api_url, confirmations=DEFAULT_CONFIRMATIONS,
+              timeout=60):
+    """Bulk loads the state at the block confirmations blocks behind the
+    current head, or at genesis on shorter chains. Returns the id of that
+    block, or None if the database already holds blocks.
+    """
+    if database.last_known_blocks(1):
+        LOGGER.warning('Database already holds blocks, not bootstrapping')
+        return None
+
+    block_num, block_id = _fetch_confirmed(api_url, confirmations, timeout)
+    LOGGER.info('Bootstrapping from block %s: %s', block_num, block_id)
+
+    entries = 0
+    for page in _fetch_state(api_url, block_id, timeout):
+        plan = BlockWritePlan(block_num)
+        for entry, parsed_address in zip(page, parse_addresses(e['address'] for e in page)):
+            data = base64.b64decode(entry['data'])
+            for resource in data_to_dicts(entry['address'], data, parsed_address):
+                plan.add(entry['address'], resource, parsed_address)
+
+        plan.write(database)
+
+        entries += len(page)
+        LOGGER.debug('Loaded %s state entries', entries)
+
+    # Written last, like for every other block, so an interrupted bootstrap
+    # is dropped as an unfinished block on the next start
+    database.insert('blocks', {'block_num': block_num, 'block_id': block_id})
+    LOGGER.info('Bootstrapped %s state entries at block %s', entries, block_num)
+    return block_id
+
+
+def _get(url, timeout):
+    with urlopen(url, timeout=timeout) as response:
+        return json.loads(response.read().decode('utf-8'))
+
+
+def _fetch_confirmed(api_url, confirmations, timeout):
+    """Returns the number and id of the block confirmations blocks behind
+    the head, read from the newest blocks, which /blocks lists first.
+    """
+    url = '{}/blocks?{}'.format(api_url, urlencode({'limit': confirmations + 1}))
+    block = _get(url, timeout)['data'][-1]
+    return int(block['header']['block_num']), block['header_signature']
+
+
+def _fetch_state(api_url, head_id, timeout):
+    """Yields the state entries of the namespace at the head block, a page at
+    a time.
+    """
+    url = '{}/state?{}'.format(api_url, urlencode({
+        'address': NAMESPACE, 'head': head_id, 'limit': STATE_PAGE_LIMIT}))
+    while url:
+        response = _get(url, timeout)
+        yield response['data']
+        url = response.get('paging', {}).get('next')
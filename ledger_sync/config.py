@@ -0,0 +1,6 @@
+DB_HOST = "rethink"
+DB_PORT = 28015
+DB_NAME = "supply_chain"
+
+VALIDATOR_URL = "tcp://validator:4004"
+REST_API_URL = "http://rest-api:8008"
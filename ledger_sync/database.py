@@ -16,25 +16,49 @@
 
 from ledger_sync.config import DB_HOST, DB_PORT, DB_NAME
 
+import sys
 import logging
 from rethinkdb import RethinkDB
 r = RethinkDB()
 
 LOGGER = logging.getLogger(__name__)
 
+# Tables holding versioned resources, valid from start_block_num until end_block_num
+RESOURCE_TABLES = ['agents', 'recordTypes', 'records', 'properties', 'propertyPages']
+BLOCK_RANGE_INDEXES = ['start_block_num', 'end_block_num']
+
+# Compound indexes web_api reads properties and property pages by. end_block_num comes last, so the versions of
+# one property (page) that are valid at a block are a single index range.
+READ_INDEXES = {
+    'properties': {
+        'record_name_end': [r.row['record_id'], r.row['name'], r.row['end_block_num']]},
+    'propertyPages': {
+        'record_name_page_end': [r.row['record_id'], r.row['name'], r.row['page_num'], r.row['end_block_num']]},
+}
+
+# Tables holding only the current version of each resource, keyed by its natural key, by the table holding all
+# versions. Their rows are upserted with every block, and rolled back with the versioned tables.
+CURRENT_TABLES = {
+    'agents': ('currentAgents', 'public_key'),
+    'recordTypes': ('currentRecordTypes', 'name'),
+    'records': ('currentRecords', 'record_id'),
+}
+
 
 class Database(object):
     """Simple object for managing a connection to a rethink database
     """
-    def __init__(self):
-        self._name = DB_NAME
+    def __init__(self, host=DB_HOST, port=DB_PORT, name=DB_NAME):
+        self._host = host
+        self._port = port
+        self._name = name
         self._conn = None
 
     def connect(self):
         """Initializes a connection to the database and ensures that the required db and tables exist
         """
-        LOGGER.debug('Connecting to database: %s:%s', DB_HOST, DB_PORT)
-        self._conn = r.connect(host=DB_HOST, port=DB_PORT)
+        LOGGER.debug('Connecting to database: %s:%s', self._host, self._port)
+        self._conn = r.connect(host=self._host, port=self._port)
         self._ensure_db_and_tables()
 
     def disconnect(self):
@@ -47,10 +71,10 @@ class Database(object):
         """ Ensures that the necessary tables exists
         """
         dbs = r.db_list().run(self._conn)
-        if DB_NAME not in dbs:
-            r.db_create(DB_NAME).run(self._conn)
+        if self._name not in dbs:
+            r.db_create(self._name).run(self._conn)
 
-        self._conn.use('supply_chain')
+        self._conn.use(self._name)
 
         tables = r.table_list().run(self._conn)
         if 'blocks' not in tables:
@@ -73,6 +97,36 @@ class Database(object):
             r.db(self._name).table('propertyPages')\
                 .index_create('attributes', [r.row["name"], r.row["record_id"], r.row["page_num"]]).run(self._conn)
 
+        for table_name in RESOURCE_TABLES:
+            table = r.db(self._name).table(table_name)
+            indexes = table.index_list().run(self._conn)
+            for index in BLOCK_RANGE_INDEXES:
+                if index not in indexes:
+                    table.index_create(index).run(self._conn)
+            for index, index_function in READ_INDEXES.get(table_name, {}).items():
+                if index not in indexes:
+                    table.index_create(index, index_function).run(self._conn)
+            table.index_wait().run(self._conn)
+
+        for table_name, (current_table_name, primary_key) in CURRENT_TABLES.items():
+            if current_table_name not in tables:
+                r.table_create(current_table_name, primary_key=primary_key).run(self._conn)
+                current_table = r.db(self._name).table(current_table_name)
+                current_table.index_create('start_block_num').run(self._conn)
+                current_table.index_wait().run(self._conn)
+                # Fill from the current versions synced before the table existed, taking the newest open
+                # version of each resource should older ones not have been closed
+                results = current_table.insert(
+                    r.db(self._name).table(table_name)
+                    .between(sys.maxsize, r.maxval, index='end_block_num')
+                    .group(primary_key).max('start_block_num')
+                    .ungroup().get_field('reduction')
+                    .without('id'))\
+                    .run(self._conn)
+                if results['errors']:
+                    LOGGER.warning('Failed to fill %s of the rows of %s: %s',
+                                   results['errors'], current_table_name, results['first_error'])
+
     def fetch(self, table_name, primary_id):
         """Fetches a single resource by its primary id
         """
@@ -86,36 +140,69 @@ class Database(object):
         return r.db(self._name).table(table_name).insert(docs).run(self._conn)
 
     def last_known_blocks(self, count):
-        """Fetches the ids of the specified number of most recent blocks
+        """Fetches the ids of the specified number of most recent blocks,
+        oldest first. Reads only those blocks, from the primary key index.
         """
         cursor = r.db(self._name).table('blocks')\
-            .order_by('block_num')\
+            .order_by(index=r.desc('block_num'))\
+            .limit(count)\
             .get_field('block_id')\
             .run(self._conn)
 
-        return list(cursor)[-count:]
+        return list(cursor)[::-1]
 
     def drop_fork(self, block_num):
-        """Deletes all resources from a particular block_num
+        """Rolls back all blocks from a particular block_num on: deletes the
+        blocks and the resource versions they created, and reopens the
+        versions they closed. Only reads the rows of the dropped blocks, from
+        the block range indexes.
         """
-        block_results = r.db(self._name).table('blocks')\
-            .filter(lambda rsc: rsc['block_num'].ge(block_num))\
-            .delete()\
-            .run(self._conn)
-
-        resource_results = r.db(self._name).table_list()\
-            .for_each(
-                lambda table_name: r.branch(
-                    r.eq(table_name, 'blocks'),
-                    [],
-                    r.eq(table_name, 'auth'),  # todo: figure out how we want to do auth
-                    [],
-                    r.db(self._name).table(table_name)
-                    .filter(lambda rsc: rsc['start_block_num'].ge(block_num))
-                    .delete()))\
+        totals = {'deleted': 0, 'replaced': 0, 'errors': 0}
+
+        def run(query):
+            results = query.run(self._conn)
+            for key in totals:
+                totals[key] += results.get(key, 0)
+            return results
+
+        run(r.db(self._name).table('blocks').between(block_num, r.maxval).delete())
+
+        for table_name in RESOURCE_TABLES:
+            table = r.db(self._name).table(table_name)
+            run(table
+                .between(block_num, r.maxval, index='start_block_num')
+                .delete())
+            reopened = run(table
+                           .between(block_num, sys.maxsize, index='end_block_num')
+                           .update({'end_block_num': sys.maxsize}, return_changes=True))
+
+            if table_name in CURRENT_TABLES:
+                current_table = r.db(self._name).table(CURRENT_TABLES[table_name][0])
+                current_table\
+                    .between(block_num, r.maxval, index='start_block_num')\
+                    .delete()\
+                    .run(self._conn)
+                current_versions = [c['new_val'] for c in reopened.get('changes', [])]
+                if current_versions:
+                    current_table\
+                        .insert(r.expr(current_versions).without('id'), conflict='replace')\
+                        .run(self._conn)
+
+        return totals
+
+    def drop_unfinished_blocks(self):
+        """Deletes the resources of blocks newer than the last one in the
+        blocks table. These are left behind when ledger_sync stops while
+        writing a block, as the blocks row is written after its resources.
+        """
+        cursor = r.db(self._name).table('blocks')\
+            .order_by(index=r.desc('block_num'))\
+            .limit(1)\
+            .get_field('block_num')\
             .run(self._conn)
 
-        return {k: v + resource_results[k] for k, v in block_results.items()}
+        last_block_num = next(iter(cursor), -1)
+        return self.drop_fork(last_block_num + 1)
 
     def get_table(self, table_name):
         """Returns a rethink table query, which can be added to, and
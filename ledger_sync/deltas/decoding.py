@@ -13,7 +13,7 @@
 # limitations under the License.
 # -----------------------------------------------------------------------------
 
-from addressing.supply_chain_addressers.addresser import get_address_type
+from addressing.supply_chain_addressers.addresser import parse_address
 from addressing.supply_chain_addressers.addresser import AddressSpace
 from protobuf.supply_chain_protos.agent_pb2 import *
 from protobuf.supply_chain_protos.record_pb2 import *
@@ -30,6 +30,8 @@ CONTAINERS = {
 
 IGNORE = {
     # AddressSpace.OFFER_HISTORY: True
+    # Proposals have no table
+    AddressSpace.PROPOSAL: True
 }
 
 VALUE_TYPES = {
@@ -43,11 +45,14 @@ VALUE_TYPES = {
 }
 
 
-def data_to_dicts(address, data):
+def data_to_dicts(address, data, parsed_address=None):
     """Deserializes a protobuf "container" binary based on its address. Returns
-    a list of the decoded objects which were stored at that address.
+    a list of the decoded objects which were stored at that address. Pass the
+    address's parse_address result to avoid parsing it again.
     """
-    data_type = get_address_type(address)
+    if parsed_address is None:
+        parsed_address = parse_address(address)
+    data_type = parsed_address.address_type
 
     if IGNORE.get(data_type):
         return []
@@ -61,7 +66,7 @@ def data_to_dicts(address, data):
     dicts = [_proto_to_dict(pb) for pb in entries]
     if data_type is AddressSpace.PROPERTY_PAGE:
         for e in dicts:
-            e["page_num"] = int(address[-4:])
+            e["page_num"] = parsed_address.page
     return dicts
 
 
@@ -15,38 +15,69 @@
 
 import re
 import logging
+from collections import namedtuple
 
+from sawtooth_sdk.protobuf.events_pb2 import EventList
 from sawtooth_sdk.protobuf.transaction_receipt_pb2 import StateChangeList
 
 from ledger_sync.deltas.decoding import data_to_dicts
-from ledger_sync.deltas.updating import get_updater
-from addressing.supply_chain_addressers.addresser import NAMESPACE
+from ledger_sync.deltas.updating import BlockWritePlan
+from addressing.supply_chain_addressers.addresser import NAMESPACE, parse_addresses
 
 
 NS_REGEX = re.compile('^{}'.format(NAMESPACE))
 LOGGER = logging.getLogger(__name__)
 
+# The decoded events of one block, ready to be written by write_block
+DecodedBlock = namedtuple('DecodedBlock', ['block_num', 'block_id', 'plan'])
+
 
 def get_events_handler(database):
     """Returns a events handler with a reference to a specific Database object.
     The handler takes a list of events and updates the Database appropriately.
     """
-    return lambda events: _handle_events(database, events)
+    return lambda events: write_block(database, decode_events(events))
+
+
+def get_block_writer(database):
+    """Returns a handler with a reference to a specific Database object,
+    which takes the DecodedBlocks of decode_event_list and writes them.
+    """
+    return lambda block: write_block(database, block)
+
 
+def decode_event_list(content):
+    """Decodes a serialized EventList. Needs no database, so it can run in
+    a worker process.
+    """
+    event_list = EventList()
+    event_list.ParseFromString(content)
+    return decode_events(event_list.events)
 
-def _handle_events(database, events):
+
+def decode_events(events):
     block_num, block_id = _parse_new_block(events)
+    changes = _parse_state_changes(events)
+    return DecodedBlock(block_num, block_id,
+                        _plan_state_changes(changes, block_num))
+
 
-    if block_num:
-        is_duplicate = _resolve_if_forked(database, block_num, block_id)
+def write_block(database, block):
+    """Writes a decoded block, unless it is already known. Blocks have to be
+    written in the order they were received, to resolve forks correctly.
+    """
+    if block.block_num:
+        is_duplicate = _resolve_if_forked(
+            database, block.block_num, block.block_id)
         if is_duplicate:
             return
 
-    changes = _parse_state_changes(events)
-    _apply_state_changes(database, changes, block_num)
+    block.plan.write(database)
 
-    if block_num:  # sometimes events without blocks occur (eg. pings)
-        _insert_new_block(database, block_num, block_id)
+    # The blocks row is written last, so a block is only known once all of
+    # its resources are written
+    if block.block_num:  # sometimes events without blocks occur (eg. pings)
+        _insert_new_block(database, block.block_num, block.block_id)
 
 
 def _parse_new_block(events):
@@ -89,16 +120,13 @@ def _resolve_if_forked(database, block_num, block_id):
     return False
 
 
-def _apply_state_changes(database, changes, block_num):
-    update = get_updater(database, block_num)
-    for change in changes:
-        resources = data_to_dicts(change.address, change.value)
-        for resource in resources:
-            update_results = update(change.address, resource)
-            if update_results['inserted'] == 0:
-                LOGGER.warning(
-                    'Failed to insert resource from address: %s',
-                    change.address)
+def _plan_state_changes(changes, block_num):
+    plan = BlockWritePlan(block_num)
+    parsed_addresses = parse_addresses(c.address for c in changes)
+    for change, parsed_address in zip(changes, parsed_addresses):
+        for resource in data_to_dicts(change.address, change.value, parsed_address):
+            plan.add(change.address, resource, parsed_address)
+    return plan
 
 
 def _insert_new_block(database, block_num, block_id):
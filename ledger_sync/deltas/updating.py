@@ -14,8 +14,12 @@
 # -----------------------------------------------------------------------------
 
 import sys
+import logging
 
-from addressing.supply_chain_addressers.addresser import get_address_type, AddressSpace
+from addressing.supply_chain_addressers.addresser import parse_address, AddressSpace
+from ledger_sync.database import CURRENT_TABLES
+
+LOGGER = logging.getLogger(__name__)
 
 
 TABLE_NAMES = {
@@ -43,32 +47,65 @@ SECONDARY_INDEX_COMPONENTS = {
 }
 
 
-def get_updater(database, block_num):
-    """Returns an updater function, which can be used to update the database
-    appropriately for a particular address/data combo.
+class BlockWritePlan(object):
+    """Collects the resources changed by one block, grouped by table, and
+    writes them with a single query per table: one bulk update closing the
+    current versions of all changed resources, merged with one bulk insert
+    of their new versions. Tables with a current-state table get a second
+    query, upserting the new versions there.
     """
-    return lambda adr, rsc: _update(database, block_num, adr, rsc)
+    def __init__(self, block_num):
+        self.block_num = block_num
+        self._resources = {}
+
+    def add(self, address, resource, parsed_address=None):
+        """Adds the resource stored at an address. The address's parse_address
+        result can be passed to avoid parsing it again.
+        """
+        if parsed_address is None:
+            parsed_address = parse_address(address)
+        data_type = parsed_address.address_type
 
+        if data_type not in TABLE_NAMES:
+            raise TypeError('Unknown data type: {}'.format(data_type))
 
-def _update(database, block_num, address, resource):
-    data_type = get_address_type(address)
+        resource['start_block_num'] = self.block_num
+        resource['end_block_num'] = sys.maxsize
+        self._resources.setdefault(data_type, []).append(resource)
 
-    resource['start_block_num'] = block_num
-    resource['end_block_num'] = sys.maxsize
+    def write(self, database):
+        """Runs the planned queries, and logs a warning for every table that
+        did not take all of its planned resources.
+        """
+        for data_type, resources in self._resources.items():
+            table_name = TABLE_NAMES[data_type]
+            table_query = database.get_table(table_name)
+            index_components = SECONDARY_INDEX_COMPONENTS[data_type]
+            # Single field indexes hold the plain value, compound ones an array
+            keys = [[rsc[c] for c in index_components] for rsc in resources]
+            if len(index_components) == 1:
+                keys = [key[0] for key in keys]
 
-    try:
-        table_query = database.get_table(TABLE_NAMES[data_type])
-        seconday_index = SECONDARY_INDEXES[data_type]
-        index_components = SECONDARY_INDEX_COMPONENTS[data_type]
-    except KeyError:
-        raise TypeError('Unknown data type: {}'.format(data_type))
+            query = table_query\
+                .get_all(*keys, index=SECONDARY_INDEXES[data_type])\
+                .filter(lambda doc: (doc['end_block_num'] == sys.maxsize) &
+                        (doc['start_block_num'] < self.block_num))\
+                .update({'end_block_num': self.block_num})\
+                .merge(table_query.insert(resources).without('replaced'))
 
-    components = [resource[c] for c in index_components]
+            results = database.run_query(query)
+            self._check_written(table_name, len(resources), results['inserted'])
 
-    query = table_query\
-        .get_all(components, index=seconday_index)\
-        .filter({'end_block_num': sys.maxsize})\
-        .update({'end_block_num': block_num})\
-        .merge(table_query.insert(resource).without('replaced'))
+            if table_name in CURRENT_TABLES:
+                current_table_name, _ = CURRENT_TABLES[table_name]
+                results = database.run_query(
+                    database.get_table(current_table_name).insert(resources, conflict='replace'))
+                self._check_written(
+                    current_table_name, len(resources),
+                    results['inserted'] + results['replaced'] + results['unchanged'])
 
-    return database.run_query(query)
+    def _check_written(self, table_name, planned, written):
+        if written < planned:
+            LOGGER.warning(
+                'Wrote %s of %s resources into %s for block: %s',
+                written, planned, table_name, self.block_num)
@@ -13,8 +13,13 @@
 # See the License for the specific language governing permissions and
 # limitations under the License.
 # ------------------------------------------------------------------------------
+import os
 import sys
+import argparse
+import queue
 import logging
+import threading
+from concurrent.futures import Future, ProcessPoolExecutor
 
 from sawtooth_sdk.messaging.stream import Stream
 from sawtooth_sdk.protobuf.validator_pb2 import Message
@@ -30,11 +35,18 @@ from sawtooth_sdk.protobuf.client_event_pb2\
     import ClientEventsUnsubscribeResponse
 
 from addressing.supply_chain_addressers.addresser import NAMESPACE
+from ledger_sync.bootstrap import bootstrap, DEFAULT_CONFIRMATIONS
+from ledger_sync.config import VALIDATOR_URL, REST_API_URL
 from ledger_sync.database import Database
-from ledger_sync.deltas.handlers import get_events_handler
+from ledger_sync.deltas.handlers import get_block_writer, decode_event_list
 
 NULL_BLOCK_ID = '0000000000000000'
 
+# Number of most recent stored blocks offered to the validator to resume from.
+# The validator resumes after the newest one it knows, so syncing continues
+# even if the newest stored blocks were dropped by a fork in the meantime.
+KNOWN_BLOCK_COUNT = 15
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -42,11 +54,23 @@ class Subscriber(object):
     """Creates an object that can subscribe to state delta events using the
     Sawtooth SDK's Stream class. Handler functions can be added prior to
     subscribing, and each will be called on each delta event received.
+
+    Events are processed in three stages connected by a queue of at most
+    queue_size messages: a thread receives event messages and hands them to
+    the decoder, and handlers are called with the decoded messages, in the
+    order they were received. The decoder turns the content of a message into
+    what handlers are passed, by default the list of its events. With more
+    than one decode worker, messages are decoded in parallel by a pool of
+    processes, so the decoder must be a module level function.
     """
-    def __init__(self, validator_url):
+    def __init__(self, validator_url, decoder=None, decode_workers=1,
+                 queue_size=64):
         self._stream = Stream(validator_url)
         self._event_handlers = []
         self._is_active = False
+        self._decoder = decoder if decoder is not None else _parse_events
+        self._decode_workers = decode_workers
+        self._queue_size = queue_size
 
     def add_handler(self, handler):
         """Adds a handler which will be passed state delta events when they
@@ -87,8 +111,8 @@ class Subscriber(object):
 
         # Forked all the way back to genesis, restart with no known_ids
         if (response.status == ClientEventsSubscribeResponse.UNKNOWN_BLOCK
-                and known_ids):
-            self.start()
+                and known_ids != [NULL_BLOCK_ID]):
+            return self.start()
 
         if response.status != ClientEventsSubscribeResponse.OK:
             raise RuntimeError(
@@ -98,14 +122,56 @@ class Subscriber(object):
 
         self._is_active = True
 
-        while self._is_active:
-            message_future = self._stream.receive()
+        decoded = queue.Queue(self._queue_size)
+        executor = None
+        if self._decode_workers > 1:
+            executor = ProcessPoolExecutor(self._decode_workers)
+
+        receiver = threading.Thread(
+            target=self._receive, args=(decoded, executor), daemon=True)
+        receiver.start()
 
-            event_list = EventList()
-            event_list.ParseFromString(message_future.result().content)
+        try:
+            while self._is_active:
+                try:
+                    decode_future = decoded.get(timeout=1)
+                except queue.Empty:
+                    continue
+
+                events = decode_future.result()
+                for handler in self._event_handlers:
+                    handler(events)
+        finally:
+            self._is_active = False
+            if executor is not None:
+                executor.shutdown(wait=False)
 
-            for handler in self._event_handlers:
-                handler(event_list.events)
+    def _receive(self, decoded, executor):
+        """Receives event messages and queues the futures of their decoded
+        contents, in order. Stops at the first error, which is passed on to
+        the handling stage.
+        """
+        failed = False
+        while self._is_active and not failed:
+            try:
+                content = self._stream.receive().result().content
+                if executor is not None:
+                    decode_future = executor.submit(self._decoder, content)
+                else:
+                    decode_future = Future()
+                    decode_future.set_result(self._decoder(content))
+            except Exception as err:  # pylint: disable=broad-except
+                decode_future = Future()
+                decode_future.set_exception(err)
+                failed = True
+
+            while True:
+                try:
+                    decoded.put(decode_future, timeout=1)
+                    break
+                except queue.Full:
+                    if not self._is_active:
+                        return
 
     def stop(self):
         """Stops the Subscriber, unsubscribing from state delta events and
@@ -123,16 +189,76 @@ class Subscriber(object):
         self._stream.close()
 
 
-def main():
+def _parse_events(content):
+    event_list = EventList()
+    event_list.ParseFromString(content)
+    return list(event_list.events)
+
+
+def resume_ids(database):
+    """Returns the ids of the last stored blocks, newest first, after dropping
+    whatever was written for a block that was not finished.
+    """
+    drop_results = database.drop_unfinished_blocks()
+    if drop_results['deleted']:
+        LOGGER.info('Dropped %s resources of an unfinished block',
+                    drop_results['deleted'])
+
+    known_ids = database.last_known_blocks(KNOWN_BLOCK_COUNT)[::-1]
+    if known_ids:
+        LOGGER.info('Resuming after block: %s', known_ids[0])
+    return known_ids
+
+
+def parse_args(args):
+    parser = argparse.ArgumentParser(
+        description='Syncs the supply chain state of a validator into RethinkDB')
+
+    parser.add_argument(
+        '-C', '--connect',
+        default=VALIDATOR_URL,
+        help='Endpoint for the validator connection')
+
+    parser.add_argument(
+        '--rest-api',
+        default=REST_API_URL,
+        help='URL of the REST API, used to bootstrap')
+
+    parser.add_argument(
+        '--bootstrap',
+        action='store_true',
+        help='Load the current state from the REST API when the database '
+             'holds no blocks yet, instead of replaying every block')
+
+    parser.add_argument(
+        '--bootstrap-confirmations',
+        type=int,
+        default=DEFAULT_CONFIRMATIONS,
+        help='Number of blocks behind the head to load the state at, so '
+             'that the block is unlikely to be dropped in a fork')
+
+    return parser.parse_args(args)
+
+
+def main(args=None):
+    opts = parse_args(sys.argv[1:] if args is None else args)
+
     try:
         db = Database()
         db.connect()
         LOGGER.info('Starting Ledger Sync...')
 
-        subscriber = Subscriber('tcp://validator:4004')
-        subscriber.add_handler(get_events_handler(db))
+        known_ids = resume_ids(db)
+        if opts.bootstrap and not known_ids:
+            known_ids = [bootstrap(
+                db, opts.rest_api, opts.bootstrap_confirmations)]
+
+        subscriber = Subscriber(opts.connect,
+                                decoder=decode_event_list,
+                                decode_workers=os.cpu_count())
+        subscriber.add_handler(get_block_writer(db))
         print("Starting ledger sync")
-        subscriber.start()
+        subscriber.start(known_ids)
 
     except KeyboardInterrupt:
         sys.exit(0)
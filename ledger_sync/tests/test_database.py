@@ -0,0 +1,131 @@
+import os
+import sys
+import time
+import unittest
+
+from rethinkdb import RethinkDB
+from rethinkdb.errors import ReqlDriverError
+
+from addressing.supply_chain_addressers.addresser import get_record_address
+from ledger_sync.config import DB_HOST, DB_PORT
+from ledger_sync.database import Database
+from ledger_sync.deltas.updating import BlockWritePlan
+
+r = RethinkDB()
+
+TEST_DB_HOST = os.environ.get('TEST_DB_HOST', DB_HOST)
+TEST_DB_PORT = int(os.environ.get('TEST_DB_PORT', DB_PORT))
+TEST_DB_NAME = 'ledger_sync_test'
+
+# Size of the synthetic chain, override with TEST_BLOCK_COUNT for quicker runs
+BLOCK_COUNT = int(os.environ.get('TEST_BLOCK_COUNT', 1000000))
+INSERT_CHUNK_SIZE = 10000
+
+
+def _fastest_call(function, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+class DatabaseTest(unittest.TestCase):
+    """ Needs a RethinkDB server, the tests are skipped when none can be reached. """
+
+    @classmethod
+    def setUpClass(cls):
+        try:
+            conn = r.connect(host=TEST_DB_HOST, port=TEST_DB_PORT, timeout=2)
+        except ReqlDriverError:
+            raise unittest.SkipTest('No RethinkDB server at {}:{}'.format(TEST_DB_HOST, TEST_DB_PORT))
+
+        if TEST_DB_NAME in r.db_list().run(conn):
+            r.db_drop(TEST_DB_NAME).run(conn)
+        conn.close()
+
+        cls.database = Database(TEST_DB_HOST, TEST_DB_PORT, TEST_DB_NAME)
+        cls.database.connect()
+
+    @classmethod
+    def tearDownClass(cls):
+        cls.database.run_query(r.db_drop(TEST_DB_NAME))
+        cls.database.disconnect()
+
+    def _insert_blocks(self, start, stop):
+        for chunk_start in range(start, stop, INSERT_CHUNK_SIZE):
+            self.database.insert('blocks', [
+                {'block_num': n, 'block_id': 'block-{}'.format(n)}
+                for n in range(chunk_start, min(chunk_start + INSERT_CHUNK_SIZE, stop))])
+
+    def test_last_known_blocks(self):
+        self._insert_blocks(0, 1000)
+        self.assertEqual(self.database.last_known_blocks(3), ['block-997', 'block-998', 'block-999'],
+                         "The newest blocks are returned, oldest first.")
+        small_chain = _fastest_call(lambda: self.database.last_known_blocks(15))
+
+        self._insert_blocks(1000, BLOCK_COUNT)
+        self.assertEqual(self.database.last_known_blocks(2),
+                         ['block-{}'.format(BLOCK_COUNT - 2), 'block-{}'.format(BLOCK_COUNT - 1)],
+                         "The newest blocks are returned, oldest first.")
+        large_chain = _fastest_call(lambda: self.database.last_known_blocks(15))
+
+        self.assertLess(large_chain, max(10 * small_chain, 0.05),
+                        "Fetching the newest blocks does not slow down with the length of the chain.")
+
+    def test_drop_fork(self):
+        self.database.insert('agents', [
+            {'public_key': 'a', 'name': 'v1', 'start_block_num': 1, 'end_block_num': 5},
+            {'public_key': 'a', 'name': 'v2', 'start_block_num': 5, 'end_block_num': 7},
+            {'public_key': 'a', 'name': 'v3', 'start_block_num': 7, 'end_block_num': sys.maxsize},
+            {'public_key': 'b', 'name': 'v1', 'start_block_num': 2, 'end_block_num': sys.maxsize},
+        ])
+
+        self.database.insert('currentAgents', [
+            {'public_key': 'a', 'name': 'v3', 'start_block_num': 7, 'end_block_num': sys.maxsize},
+            {'public_key': 'b', 'name': 'v1', 'start_block_num': 2, 'end_block_num': sys.maxsize},
+        ])
+
+        results = self.database.drop_fork(5)
+        agents = self.database.run_query(self.database.get_table('agents').pluck(
+            'public_key', 'name', 'end_block_num').order_by('public_key'))
+
+        self.assertEqual(results['replaced'], 1, "The version closed in the dropped blocks is reopened.")
+        self.assertEqual(agents, [{'public_key': 'a', 'name': 'v1', 'end_block_num': sys.maxsize},
+                                  {'public_key': 'b', 'name': 'v1', 'end_block_num': sys.maxsize}],
+                         "Versions created in the dropped blocks are deleted.")
+
+        current_agents = self.database.run_query(self.database.get_table('currentAgents').pluck(
+            'public_key', 'name').order_by('public_key'))
+        self.assertEqual(current_agents, [{'public_key': 'a', 'name': 'v1'}, {'public_key': 'b', 'name': 'v1'}],
+                         "The current-state table holds the reopened versions.")
+
+    def test_block_write_plan_closes_superseded_versions(self):
+        address = get_record_address('plan-record')
+        for block_num, owner in [(10, 'owner-1'), (11, 'owner-2')]:
+            plan = BlockWritePlan(block_num)
+            plan.add(address, {'record_id': 'plan-record', 'owners': [owner]})
+            plan.write(self.database)
+
+        open_versions = self.database.run_query(self.database.get_table('records')
+                                                .get_all('plan-record', index='record_id')
+                                                .filter({'end_block_num': sys.maxsize})
+                                                .pluck('owners', 'start_block_num')
+                                                .coerce_to('array'))
+        self.assertEqual(open_versions, [{'owners': ['owner-2'], 'start_block_num': 11}],
+                         "Only the version of the newest block is still open.")
+
+    def test_drop_fork_restores_updated_current_version(self):
+        address = get_record_address('forked-record')
+        for block_num, owner in [(20, 'owner-1'), (21, 'owner-2'), (22, 'owner-3')]:
+            plan = BlockWritePlan(block_num)
+            plan.add(address, {'record_id': 'forked-record', 'owners': [owner]})
+            plan.write(self.database)
+
+        self.database.drop_fork(21)
+
+        current = self.database.fetch('currentRecords', 'forked-record')
+        self.assertIsNotNone(current, "A record updated in the dropped blocks stays in the current-state table.")
+        self.assertEqual((current['owners'], current['start_block_num']), (['owner-1'], 20),
+                         "The current-state table holds the version from before the fork.")
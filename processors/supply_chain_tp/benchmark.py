@@ -0,0 +1,96 @@
+import argparse
+import os
+import random
+import sys
+import timeit
+
+from protobuf.supply_chain_protos.property_pb2 import PropertyPage
+
+from handler import PROPERTY_PAGE_MAX_LENGTH, _insert_reported_value
+
+
+def create_parser(prog_name):
+    parser = argparse.ArgumentParser(
+        prog=prog_name,
+        description='Measures the time it takes to add one reported value '
+                    'to a property page at different fill levels.')
+
+    parser.add_argument(
+        '-n', '--number',
+        type=int,
+        default=1000,
+        help='Updates timed per fill level')
+
+    parser.add_argument(
+        '-s', '--step',
+        type=int,
+        default=32,
+        help='Distance between the measured fill levels')
+
+    parser.add_argument(
+        '--out-of-order',
+        type=float,
+        default=0.0,
+        help='Fraction of updates older than the newest value on the page')
+
+    return parser
+
+
+def _make_page(fill_level):
+    page = PropertyPage(name='benchmark', record_id='benchmark')
+    for timestamp in range(fill_level):
+        page.reported_values.add(
+            reporter_index=0,
+            timestamp=timestamp * 2,
+            number_value=timestamp)
+    return page
+
+
+def _make_value(fill_level, out_of_order):
+    if fill_level and random.random() < out_of_order:
+        timestamp = random.randrange(fill_level * 2)
+    else:
+        timestamp = fill_level * 2
+    return PropertyPage.ReportedValue(
+        reporter_index=0,
+        timestamp=timestamp,
+        number_value=timestamp)
+
+
+def _sort_insert(page, reported_value):
+    """The previous way of adding a value: append and re-sort the page"""
+    page.reported_values.extend([reported_value])
+    page.reported_values.sort(
+        key=lambda val: (val.timestamp, val.reporter_index))
+
+
+def _time_update(insert, fill_level, number, out_of_order):
+    """Returns the mean time in microseconds of adding one value to a page
+    holding fill_level values. Page setup is not part of the timing.
+    """
+    total = 0.0
+    for _ in range(number):
+        page = _make_page(fill_level)
+        value = _make_value(fill_level, out_of_order)
+        total += timeit.timeit(lambda: insert(page, value), number=1)
+    return total / number * 1e6
+
+
+def main(prog_name=os.path.basename(sys.argv[0]), args=None):
+    if args is None:
+        args = sys.argv[1:]
+    args = create_parser(prog_name).parse_args(args)
+
+    print('{:>10} {:>14} {:>14}'.format('fill', 'sort (us)', 'insert (us)'))
+
+    levels = list(range(0, PROPERTY_PAGE_MAX_LENGTH, args.step))
+    levels.append(PROPERTY_PAGE_MAX_LENGTH - 1)
+
+    for fill_level in levels:
+        print('{:>10} {:>14.2f} {:>14.2f}'.format(
+            fill_level,
+            _time_update(
+                _sort_insert, fill_level, args.number, args.out_of_order),
+            _time_update(
+                _insert_reported_value, fill_level, args.number,
+                args.out_of_order)))
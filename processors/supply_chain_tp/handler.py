@@ -1,4 +1,5 @@
 import datetime
+import functools
 import logging
 import time
 
@@ -13,6 +14,8 @@ from protobuf.supply_chain_protos.record_pb2 import *
 
 from addressing.supply_chain_addressers import addresser
 
+from state import SupplyChainState, PREFETCH_COUNTER
+
 SYNC_TOLERANCE = 60 * 5
 MAX_LAT = 90 * 1e6
 MIN_LAT = -90 * 1e6
@@ -23,8 +26,11 @@ LOGGER = logging.getLogger(__name__)
 LOGGER.setLevel(logging.DEBUG)
 
 PROPERTY_PAGE_MAX_LENGTH = 256
+PROPERTY_PAGE_LENGTH_LIMIT = 16 ** 3
 TOTAL_PROPERTY_PAGE_MAX = 16 ** 4 - 1
 
+RECORD_TYPE_SCHEMA_CACHE_SIZE = 1024
+
 
 class SupplyChainTransactionHandler(TransactionHandler):
 
@@ -56,11 +62,33 @@ class SupplyChainTransactionHandler(TransactionHandler):
 
         Besides this, the transaction's timestamp is verified, since
         that validation is common to all transactions.
+
+        The handlers work on a SupplyChainState wrapping the context, so
+        every address is read at most once per transaction and all
+        writes are sent to the validator together once the handler has
+        succeeded. All declared input addresses are prefetched in one
+        read before the handler runs.
         """
         LOGGER.info("apply() method ")
         LOGGER.info(transaction)
         signer, timestamp, payload, handler = _unpack_transaction(transaction)
-        handler(payload, signer, timestamp, context)
+        state = SupplyChainState(context)
+        state.prefetch(transaction.header.inputs)
+        handler(payload, signer, timestamp, state)
+        state.flush()
+        _record_prefetch_stats(transaction, state)
+
+
+def _record_prefetch_stats(transaction, state):
+    PREFETCH_COUNTER.add(state.hits, state.misses)
+
+    if state.misses:
+        LOGGER.debug(
+            'Transaction %s read %s address(es) not prefetched (declared '
+            'by prefix or not at all) (prefetch hits: %s, misses: %s; '
+            'totals: %s/%s)',
+            transaction.signature, state.misses, state.hits, state.misses,
+            PREFETCH_COUNTER.hits, PREFETCH_COUNTER.misses)
 
 
 def _unpack_transaction(transaction):
@@ -145,9 +173,54 @@ def _create_record(payload, signer, timestamp, state):
     # Check that the signer is registered.
     _verify_agent(state, signer)
 
-    # Check that the record doesn't already exist
-    record_id = payload.record_id
+    # Check that the record type exists.
+    schema = _get_record_type_schema(state, payload.record_type)
+
+    _make_new_record(
+        state=state,
+        signer=signer,
+        timestamp=timestamp,
+        schema=schema,
+        record_id=payload.record_id,
+        properties=payload.properties,
+    )
+
+
+def _create_records_bulk(payload, signer, timestamp, state):
+    """
+    * Check that the signer is registered (once).
+    * Check that the record type exists (once).
+    * Create every record as _create_record would. If any of them is
+      invalid, the whole transaction is invalid.
+    """
+    _verify_agent(state, signer)
+
+    type_name = payload.record_type
+    schema = _get_record_type_schema(state, type_name)
+
+    if not payload.records:
+        raise InvalidTransaction(
+            'No records provided')
+
+    for record in payload.records:
+        if record.record_type not in ('', type_name):
+            raise InvalidTransaction(
+                'Record {} is not of type {}'.format(
+                    record.record_id, type_name))
 
+        _make_new_record(
+            state=state,
+            signer=signer,
+            timestamp=timestamp,
+            schema=schema,
+            record_id=record.record_id,
+            properties=record.properties,
+        )
+
+
+def _make_new_record(state, signer, timestamp, schema,
+                     record_id, properties):
+    # Check that the record doesn't already exist
     if not record_id:
         raise InvalidTransaction(
             'Record id cannot be empty string')
@@ -159,38 +232,30 @@ def _create_record(payload, signer, timestamp, state):
         raise InvalidTransaction(
             'Record {} already exists'.format(record_id))
 
-    # Check that the record type exists.
-    type_name = payload.record_type
-    record_type, _, _ = _get_record_type(state, type_name)
-
-    type_schemata = {
-        prop.name: prop
-        for prop in record_type.properties
-    }
-
-    required_properties = {
-        name: prop
-        for name, prop in type_schemata.items()
-        if prop.required
-    }
+    type_name = schema.name
 
     provided_properties = {
         prop.name: prop
-        for prop in payload.properties
+        for prop in properties
     }
 
     # Make sure the required properties are all provided
-    for name in required_properties:
-        if name not in provided_properties:
-            raise InvalidTransaction(
-                'Required property {} not provided'.format(
-                    name))
+    missing = schema.required - provided_properties.keys()
+    if missing:
+        raise InvalidTransaction(
+            'Required property {} not provided'.format(
+                min(missing)))
 
     # Make sure the provided properties have the right type
-    for provided_name in provided_properties:
-        required_type = type_schemata[provided_name].data_type
-        provided_type = provided_properties[provided_name].data_type
-        if required_type != provided_type:
+    for provided_name, provided in provided_properties.items():
+        try:
+            required_type = schema.data_types[provided_name]
+        except KeyError:
+            raise InvalidTransaction(
+                'Record type {} has no property {}'.format(
+                    type_name, provided_name))
+
+        if required_type != provided.data_type:
             raise InvalidTransaction(
                 'Value provided for {} is the wrong type'.format(
                     provided_name))
@@ -222,7 +287,7 @@ def _create_record(payload, signer, timestamp, state):
     _set_container(state, record_address, record_container)
 
     # Create the associated properties
-    for property_name, prop in type_schemata.items():
+    for property_name, prop in schema.properties.items():
         _make_new_property(
             state=state,
             record_id=record_id,
@@ -322,6 +387,22 @@ def _create_record_type(payload, signer, timestamp, state):
             raise InvalidTransaction(
                 'Property name cannot be empty string')
 
+        if prop.page_size > PROPERTY_PAGE_LENGTH_LIMIT:
+            raise InvalidTransaction(
+                'Page size of {} cannot exceed {}'.format(
+                    prop.name, PROPERTY_PAGE_LENGTH_LIMIT))
+
+        if prop.page_count > TOTAL_PROPERTY_PAGE_MAX:
+            raise InvalidTransaction(
+                'Page count of {} cannot exceed {}'.format(
+                    prop.name, TOTAL_PROPERTY_PAGE_MAX))
+
+        # A single page ring would wrap onto the page just filled and
+        # clear it, losing the value that filled it
+        if prop.page_count == 1:
+            raise InvalidTransaction(
+                'Page count of {} must be at least 2'.format(prop.name))
+
     address = addresser.get_record_type_address(name)
 
     container = _get_container(state, address)
@@ -370,16 +451,42 @@ def _update_properties(payload, signer, timestamp, state):
     * Check that the signer is an authorized reporter
     * Check that the types are correct
     """
+    _update_record_properties(
+        state=state,
+        signer=signer,
+        timestamp=timestamp,
+        record_id=payload.record_id,
+        updates=payload.properties,
+    )
+
+
+def _update_properties_bulk(payload, signer, timestamp, state):
+    """
+    * Apply every record's updates as _update_properties would. If any
+      of them is invalid, the whole transaction is invalid.
+    """
+    if not payload.updates:
+        raise InvalidTransaction(
+            'No updates provided')
+
+    for record_update in payload.updates:
+        _update_record_properties(
+            state=state,
+            signer=signer,
+            timestamp=timestamp,
+            record_id=record_update.record_id,
+            updates=record_update.properties,
+        )
+
+
+def _update_record_properties(state, signer, timestamp, record_id, updates):
     # Check that the record is not final
-    record_id = payload.record_id
     record, _, _ = _get_record(state, record_id)
 
     if record.final:
         raise InvalidTransaction(
             'Record is final')
 
-    updates = payload.properties
-
     for update in updates:
         name, data_type = update.name, update.data_type
         property_address = addresser.get_property_address(record_id, name)
@@ -430,18 +537,16 @@ def _update_properties(payload, signer, timestamp, state):
             prop=update,
         )
 
-        page.reported_values.extend([reported_value])
-        page.reported_values.sort(
-            key=lambda val: (val.timestamp, val.reporter_index))
+        _insert_reported_value(page, reported_value)
 
         _set_container(state, page_address, page_container)
 
         # increment page if needed
 
-        if len(page.reported_values) >= PROPERTY_PAGE_MAX_LENGTH:
+        if len(page.reported_values) >= _page_size(prop):
             new_page_number = (
                 page_number + 1
-                if page_number + 1 <= TOTAL_PROPERTY_PAGE_MAX
+                if page_number + 1 <= _page_count(prop)
                 else 1
             )
 
@@ -644,7 +749,9 @@ def _make_new_property(state, record_id, property_name, prop, signer):
         current_page=1,
         wrapped=False,
         fixed=prop.fixed,
-        unit=prop.unit
+        unit=prop.unit,
+        page_size=prop.page_size,
+        page_count=prop.page_count,
     )
 
     if prop.data_type == PropertySchema.DataType.STRUCT:
@@ -670,6 +777,16 @@ def _make_new_property(state, record_id, property_name, prop, signer):
     _set_container(state, property_address, property_container)
 
 
+def _page_size(prop):
+    """ Number of reported values a page of the property holds """
+    return prop.page_size or PROPERTY_PAGE_MAX_LENGTH
+
+
+def _page_count(prop):
+    """ Number of pages in the property's ring """
+    return prop.page_count or TOTAL_PROPERTY_PAGE_MAX
+
+
 def _make_new_property_page(
         state, timestamp, record_id,
         property_name, value, page_number):
@@ -709,6 +826,34 @@ def _make_new_reported_value(reporter_index, timestamp, prop):
     return reported_value
 
 
+def _reported_value_key(reported_value):
+    return reported_value.timestamp, reported_value.reporter_index
+
+
+def _insert_reported_value(page, reported_value):
+    """Adds a reported value to a page, keeping the values sorted by
+    timestamp and then reporter index. Values almost always arrive in
+    order and are simply appended; older ones are placed with a binary
+    search instead of re-sorting the page.
+    """
+    values = page.reported_values
+    key = _reported_value_key(reported_value)
+
+    if not values or _reported_value_key(values[-1]) <= key:
+        values.append(reported_value)
+        return
+
+    low, high = 0, len(values)
+    while low < high:
+        middle = (low + high) // 2
+        if key < _reported_value_key(values[middle]):
+            high = middle
+        else:
+            low = middle + 1
+
+    values.insert(low, reported_value)
+
+
 def _set_attribute(src, dst):
     attribute = DATA_TYPE_TO_ATTRIBUTE[src.data_type]
     if attribute == 'location_value':
@@ -899,44 +1044,18 @@ TYPE_TO_ACTION_HANDLER = {
     SupplyChainPayload.CREATE_PROPOSAL: ('create_proposal', _create_proposal),
     SupplyChainPayload.ANSWER_PROPOSAL: ('answer_proposal', _answer_proposal),
     SupplyChainPayload.REVOKE_REPORTER: ('revoke_reporter', _revoke_reporter),
+    SupplyChainPayload.CREATE_RECORDS_BULK: ('create_records_bulk', _create_records_bulk),
+    SupplyChainPayload.UPDATE_PROPERTIES_BULK: ('update_properties_bulk', _update_properties_bulk),
 }
 
 
 # Helper methods
 def _set_container(state, address, container):
-    addresses = state.set_state({
-        address: container.SerializeToString()
-    })
-
-    if not addresses:
-        raise InternalError(
-            'State error -- failed to set state entries')
+    state.set_container(address, container)
 
 
 def _get_container(state, address):
-    # Get the appropriate container type based on the address
-    namespace = address[6:8]
-
-    containers = {
-        addresser.AGENT_PREFIX: AgentContainer,
-        addresser.PROPERTY_PREFIX: (PropertyContainer
-                                    if address[-4:] == '0000'
-                                    else PropertyPageContainer),
-        addresser.PROPOSAL_PREFIX: ProposalContainer,
-        addresser.RECORD_PREFIX: RecordContainer,
-        addresser.RECORD_TYPE_PREFIX: RecordTypeContainer,
-    }
-
-    container = containers[namespace]()
-
-    # Get data from state
-    entries = state.get_state([address])
-
-    if entries:
-        data = entries[0].data
-        container.ParseFromString(data)
-
-    return container
+    return state.get_container(address)
 
 
 def _verify_agent(state, public_key):
@@ -966,6 +1085,47 @@ def _get_record_type(state, type_name):
     return record_type, type_container, type_address
 
 
+class RecordTypeSchema(object):
+    """A RecordType compiled for validating new records: the property
+    schemata by name, the set of required names and the expected data
+    type of each property.
+    """
+
+    def __init__(self, record_type):
+        self.name = record_type.name
+        self.properties = {
+            prop.name: prop
+            for prop in record_type.properties
+        }
+        self.required = frozenset(
+            name
+            for name, prop in self.properties.items()
+            if prop.required
+        )
+        self.data_types = {
+            name: prop.data_type
+            for name, prop in self.properties.items()
+        }
+
+
+def _get_record_type_schema(state, type_name):
+    """ Return the compiled RecordTypeSchema of a record type """
+    record_type, _, _ = _get_record_type(state, type_name)
+    return _compile_record_type(type_name, record_type.SerializeToString())
+
+
+@functools.lru_cache(maxsize=RECORD_TYPE_SCHEMA_CACHE_SIZE)
+def _compile_record_type(type_name, serialized_record_type):
+    """Process-wide cache of compiled record types. Record types are never
+    changed once created, but the serialized definition is part of the
+    key so a record type re-created differently on another fork is never
+    validated against a stale schema.
+    """
+    record_type = RecordType()
+    record_type.ParseFromString(serialized_record_type)
+    return RecordTypeSchema(record_type)
+
+
 def _is_owner(record, agent_id):
     return record.owners[-1].agent_id == agent_id
 
@@ -1,13 +1,169 @@
+import threading
+
 from protobuf.supply_chain_protos import agent_pb2
+from protobuf.supply_chain_protos import property_pb2
+from protobuf.supply_chain_protos import proposal_pb2
+from protobuf.supply_chain_protos import record_pb2
 
-# TODO: Populate me
 from addressing.supply_chain_addressers import addresser
 
+from sawtooth_sdk.processor.exceptions import InternalError
+
+ADDRESS_LENGTH = 70
+
+
+def _container_class(address):
+    """Returns the container type stored at an address"""
+    namespace = address[6:8]
+
+    if namespace == addresser.PROPERTY_PREFIX:
+        return (property_pb2.PropertyContainer
+                if address[-4:] == '0000'
+                else property_pb2.PropertyPageContainer)
+
+    return {
+        addresser.AGENT_PREFIX: agent_pb2.AgentContainer,
+        addresser.PROPOSAL_PREFIX: proposal_pb2.ProposalContainer,
+        addresser.RECORD_PREFIX: record_pb2.RecordContainer,
+        addresser.RECORD_TYPE_PREFIX: record_pb2.RecordTypeContainer,
+    }[namespace]
+
+
+class PrefetchCounter(object):
+    """Process-wide tally of container lookups served by the input
+    prefetch (hits) and of lookups that needed their own round-trip to
+    the validator (misses). Misses mean a client declared an address
+    range, or nothing at all, where it could have declared the address.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def add(self, hits, misses):
+        with self._lock:
+            self.hits += hits
+            self.misses += misses
+
+
+PREFETCH_COUNTER = PrefetchCounter()
+
 
 class SupplyChainState(object):
+    """Transaction-scoped view of the supply chain state.
+
+    Containers are parsed once per address and kept for the rest of the
+    transaction, so repeated lookups of the same record, record type or
+    agent do not go back to the validator. Writes are only recorded
+    here; they reach the validator in a single set_state call when
+    flush() is called at the end of the transaction.
+    """
+
     def __init__(self, context, timeout=2):
         self._context = context
         self._timeout = timeout
+        self._containers = {}
+        self._dirty = set()
+        self._prefetched = set()
+        self.hits = 0
+        self.misses = 0
+
+    def prefetch(self, addresses):
+        """Reads every full supply chain address among addresses from the
+        validator in one get_state call and keeps the parsed containers.
+        Addresses that are unset in state are remembered as empty
+        containers, so looking them up later costs nothing either.
+
+        Args:
+            addresses (list of str): Typically the transaction's declared
+                inputs. Address prefixes and addresses of other
+                namespaces are skipped.
+        """
+        addresses = sorted({
+            address for address in addresses
+            if len(address) == ADDRESS_LENGTH
+            and address.startswith(addresser.NAMESPACE)
+            and address not in self._containers
+        })
+
+        if not addresses:
+            return
+
+        state_entries = self._context.get_state(
+            addresses=addresses, timeout=self._timeout)
+        data = {entry.address: entry.data for entry in state_entries}
+
+        for address in addresses:
+            container = _container_class(address)()
+            if address in data:
+                container.ParseFromString(data[address])
+            self._containers[address] = container
+
+        self._prefetched.update(addresses)
+
+    def get_container(self, address):
+        """Gets the container stored at an address, reading it from the
+        validator only the first time it is requested.
+
+        Args:
+            address (str): The state address
+
+        Returns:
+            The (mutable) container parsed from state, or an empty
+            container of the right type if the address is unset
+        """
+        try:
+            container = self._containers[address]
+        except KeyError:
+            pass
+        else:
+            if address in self._prefetched:
+                self._prefetched.discard(address)
+                self.hits += 1
+            return container
+
+        self.misses += 1
+        container = _container_class(address)()
+
+        state_entries = self._context.get_state(
+            addresses=[address], timeout=self._timeout)
+        if state_entries:
+            container.ParseFromString(state_entries[0].data)
+
+        self._containers[address] = container
+        return container
+
+    def set_container(self, address, container):
+        """Marks a container as modified. It is written on flush()
+
+        Args:
+            address (str): The state address
+            container: The container to store at the address
+        """
+        self._containers[address] = container
+        self._dirty.add(address)
+
+    def flush(self):
+        """Writes every modified container back to the validator in one
+        set_state call.
+        """
+        if not self._dirty:
+            return
+
+        updated_state = {
+            address: self._containers[address].SerializeToString()
+            for address in sorted(self._dirty)
+        }
+
+        addresses = self._context.set_state(
+            updated_state, timeout=self._timeout)
+
+        if not addresses:
+            raise InternalError(
+                'State error -- failed to set state entries')
+
+        self._dirty.clear()
 
     def get_agent(self, public_key):
         """Gets the agent associated with the public_key
@@ -19,14 +175,11 @@ class SupplyChainState(object):
             agent_pb2.Agent: Agent with the provided public_key
         """
         address = addresser.get_agent_address(public_key)
-        state_entries = self._context.get_state(
-            addresses=[address], timeout=self._timeout)
-        if state_entries:
-            container = agent_pb2.AgentContainer()
-            container.ParseFromString(state_entries[0].data)
-            for agent in container.entries:
-                if agent.public_key == public_key:
-                    return agent
+        container = self.get_container(address)
+
+        for agent in container.entries:
+            if agent.public_key == public_key:
+                return agent
 
         return None
 
@@ -34,39 +187,15 @@ class SupplyChainState(object):
         """Creates a new agent in state
 
         Args:
-            # public_key (str): The public key of the agent
-            # name (str): The human-readable name of the agent
+            payload (CreateAgentAction): The create agent action
+            signer (str): The public key of the agent
             timestamp (int): Unix UTC timestamp of when the agent was created
         """
-        print("Hello?")
         address = addresser.get_agent_address(signer)
         agent = agent_pb2.Agent(
             public_key=signer, name=payload.name, timestamp=timestamp)
-        container = agent_pb2.AgentContainer()
-        state_entries = self._context.get_state(
-            addresses=[address], timeout=self._timeout)
-        if state_entries:
-            container.ParseFromString(state_entries[0].data)
 
+        container = self.get_container(address)
         container.entries.extend([agent])
-        data = container.SerializeToString()
-
-        updated_state = {address: data}
-        self._context.set_state(updated_state, timeout=self._timeout)
-
-#     def set_agent_old(self, public_key, name, timestamp):
-#
-#         address = addresser.get_agent_address(public_key)
-#         agent = agent_pb2.Agent(
-#             public_key=public_key, name=name, timestamp=timestamp)
-#         container = agent_pb2.AgentContainer()
-#         state_entries = self._context.get_state(
-#             addresses=[address], timeout=self._timeout)
-#         if state_entries:
-#             container.ParseFromString(state_entries[0].data)
-#
-#         container.entries.extend([agent])
-#         data = container.SerializeToString()
-#
-#         updated_state = {address: data}
-#         self._context.set_state(updated_state, timeout=self._timeout)
+
+        self.set_container(address, container)
@@ -0,0 +1,36 @@
+import time
+from types import SimpleNamespace
+
+from protobuf.supply_chain_protos.payload_pb2 import SupplyChainPayload
+
+
+class MockContext(object):
+    """In-memory stand-in for the validator's Context, counting the
+    get_state and set_state round-trips made against it.
+    """
+
+    def __init__(self):
+        self.data = {}
+        self.get_calls = []
+        self.set_calls = []
+
+    def get_state(self, addresses, timeout=None):
+        self.get_calls.append(list(addresses))
+        return [SimpleNamespace(address=address, data=self.data[address])
+                for address in addresses if address in self.data]
+
+    def set_state(self, entries, timeout=None):
+        self.set_calls.append(dict(entries))
+        self.data.update(entries)
+        return list(entries)
+
+
+def make_transaction(signer, inputs=(), **payload_fields):
+    """Returns a transaction, as passed to TransactionHandler.apply, for a
+    SupplyChainPayload with the given fields.
+    """
+    payload = SupplyChainPayload(timestamp=int(time.time()), **payload_fields)
+    return SimpleNamespace(
+        signature='signature',
+        header=SimpleNamespace(signer_public_key=signer, inputs=list(inputs)),
+        payload=payload.SerializeToString())
@@ -0,0 +1,204 @@
+import os
+import sys
+import unittest
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))))
+
+sys.path.insert(0, TOP_DIR)
+sys.path.insert(0, os.path.join(TOP_DIR, 'processors/supply_chain_tp'))
+sys.path.insert(0, os.path.join(TOP_DIR, 'protobuf'))
+
+from sawtooth_sdk.processor.exceptions import InvalidTransaction
+
+from addressing.supply_chain_addressers import addresser
+from protobuf.supply_chain_protos.payload_pb2 import SupplyChainPayload, CreateAgentAction, \
+    CreateRecordTypeAction, CreateRecordAction, CreateRecordsBulkAction, UpdatePropertiesAction, \
+    UpdatePropertiesBulkAction
+from protobuf.supply_chain_protos.property_pb2 import PropertySchema, PropertyValue, PropertyContainer, \
+    PropertyPage, PropertyPageContainer
+from protobuf.supply_chain_protos.record_pb2 import RecordContainer
+
+from handler import SupplyChainTransactionHandler, PROPERTY_PAGE_LENGTH_LIMIT, _insert_reported_value
+from mock_context import MockContext, make_transaction
+
+
+def _number(name, value):
+    return PropertyValue(name=name, data_type=PropertySchema.NUMBER, number_value=value)
+
+
+class InsertReportedValueTest(unittest.TestCase):
+
+    @staticmethod
+    def _insert_all(values):
+        page = PropertyPage(name='temperature', record_id='record')
+        for number, (timestamp, reporter_index) in enumerate(values):
+            _insert_reported_value(page, PropertyPage.ReportedValue(
+                timestamp=timestamp, reporter_index=reporter_index, number_value=number))
+        return [(value.timestamp, value.reporter_index, value.number_value) for value in page.reported_values]
+
+    def test_in_order(self):
+        self.assertEqual(self._insert_all([(1, 0), (2, 1), (2, 2), (3, 0)]),
+                         [(1, 0, 0), (2, 1, 1), (2, 2, 2), (3, 0, 3)],
+                         "Values arriving in order are appended.")
+
+    def test_out_of_order(self):
+        self.assertEqual(self._insert_all([(5, 0), (1, 0), (3, 1), (3, 0), (9, 0), (0, 0)]),
+                         [(0, 0, 5), (1, 0, 1), (3, 0, 3), (3, 1, 2), (5, 0, 0), (9, 0, 4)],
+                         "Values are kept sorted by timestamp, then reporter index.")
+
+    def test_ties(self):
+        self.assertEqual(self._insert_all([(1, 0), (4, 0), (2, 1), (2, 1), (4, 0)]),
+                         [(1, 0, 0), (2, 1, 2), (2, 1, 3), (4, 0, 1), (4, 0, 4)],
+                         "Equal values stay in the order they were reported, like with a stable sort.")
+
+    def test_matches_sort(self):
+        values = [(timestamp * 7 % 13, timestamp % 3) for timestamp in range(50)]
+        expected = sorted(((t, r, n) for n, (t, r) in enumerate(values)), key=lambda value: value[:2])
+
+        self.assertEqual(self._insert_all(values), expected, "The page is ordered as re-sorting it would.")
+
+
+class HandlerTest(unittest.TestCase):
+    """ Runs transactions through SupplyChainTransactionHandler.apply against an in-memory Context, with an agent
+        'alice' and a record type 'Pallet' with a required 'weight' and an optional 'temperature' property. """
+
+    SCHEMA = [PropertySchema(name='weight', data_type=PropertySchema.NUMBER, required=True),
+              PropertySchema(name='temperature', data_type=PropertySchema.NUMBER)]
+
+    def setUp(self):
+        self.context = MockContext()
+        self.handler = SupplyChainTransactionHandler()
+        self.apply('alice', action=SupplyChainPayload.CREATE_AGENT, create_agent=CreateAgentAction(name='Alice'))
+        self.apply('alice', action=SupplyChainPayload.CREATE_RECORD_TYPE,
+                   create_record_type=CreateRecordTypeAction(name='Pallet', properties=self.SCHEMA))
+
+    def apply(self, signer, inputs=(), **payload_fields):
+        self.handler.apply(make_transaction(signer, inputs, **payload_fields), self.context)
+
+    def create_records(self, *record_ids):
+        self.apply('alice', action=SupplyChainPayload.CREATE_RECORDS_BULK,
+                   create_records_bulk=CreateRecordsBulkAction(record_type='Pallet', records=[
+                       CreateRecordAction(record_id=record_id, properties=[_number('weight', 1)])
+                       for record_id in record_ids]))
+
+    def reported_values(self, record_id, name, page_number=1):
+        page = self.get(PropertyPageContainer, addresser.get_property_address(record_id, name, page_number))
+        return [value.number_value for value in page.entries[0].reported_values]
+
+    def get(self, container_class, address):
+        container = container_class()
+        container.ParseFromString(self.context.data[address])
+        return container
+
+    def test_create_records_bulk(self):
+        writes = len(self.context.set_calls)
+        self.apply('alice', action=SupplyChainPayload.CREATE_RECORDS_BULK,
+                   create_records_bulk=CreateRecordsBulkAction(record_type='Pallet', records=[
+                       CreateRecordAction(record_id='p1', properties=[_number('weight', 10)]),
+                       CreateRecordAction(record_id='p2', record_type='Pallet', properties=[_number('weight', 20)]),
+                   ]))
+
+        for record_id, weight in [('p1', 10), ('p2', 20)]:
+            record = self.get(RecordContainer, addresser.get_record_address(record_id)).entries[0]
+            self.assertEqual((record.record_id, record.record_type), (record_id, 'Pallet'), "The record is created.")
+
+            prop = self.get(PropertyContainer, addresser.get_property_address(record_id, 'weight')).entries[0]
+            self.assertEqual(prop.current_page, 1, "The record's properties are created.")
+
+            page = self.get(PropertyPageContainer, addresser.get_property_address(record_id, 'weight', 1))
+            self.assertEqual(page.entries[0].reported_values[0].number_value, weight,
+                             "The provided value is reported.")
+
+        self.assertEqual(len(self.context.set_calls), writes + 1, "All records are written in one set_state call.")
+
+    def test_create_records_bulk_duplicate(self):
+        writes = len(self.context.set_calls)
+        with self.assertRaises(InvalidTransaction):
+            self.apply('alice', action=SupplyChainPayload.CREATE_RECORDS_BULK,
+                       create_records_bulk=CreateRecordsBulkAction(record_type='Pallet', records=[
+                           CreateRecordAction(record_id='p1', properties=[_number('weight', 10)]),
+                           CreateRecordAction(record_id='p1', properties=[_number('weight', 20)]),
+                       ]))
+
+        self.assertEqual(len(self.context.set_calls), writes, "Nothing of an invalid bulk is written.")
+        self.assertNotIn(addresser.get_record_address('p1'), self.context.data, "No record is created.")
+
+    def test_create_records_bulk_other_type(self):
+        with self.assertRaises(InvalidTransaction):
+            self.apply('alice', action=SupplyChainPayload.CREATE_RECORDS_BULK,
+                       create_records_bulk=CreateRecordsBulkAction(record_type='Pallet', records=[
+                           CreateRecordAction(record_id='p1', record_type='Crate', properties=[_number('weight', 1)]),
+                       ]))
+
+    def test_update_properties_bulk(self):
+        self.create_records('p1', 'p2')
+        writes = len(self.context.set_calls)
+
+        self.apply('alice', action=SupplyChainPayload.UPDATE_PROPERTIES_BULK,
+                   update_properties_bulk=UpdatePropertiesBulkAction(updates=[
+                       UpdatePropertiesAction(record_id='p1', properties=[_number('temperature', 4)]),
+                       UpdatePropertiesAction(record_id='p2', properties=[_number('temperature', 5),
+                                                                          _number('weight', 2)]),
+                       UpdatePropertiesAction(record_id='p1', properties=[_number('temperature', 6)]),
+                   ]))
+
+        self.assertEqual(self.reported_values('p1', 'temperature'), [4, 6], "Updates are applied in order.")
+        self.assertEqual(self.reported_values('p2', 'temperature'), [5], "Every record is updated.")
+        self.assertEqual(self.reported_values('p2', 'weight'), [1, 2], "Every property is updated.")
+        self.assertEqual(len(self.context.set_calls), writes + 1, "All updates are written in one set_state call.")
+
+    def test_update_properties_bulk_invalid(self):
+        self.create_records('p1')
+        writes = len(self.context.set_calls)
+
+        with self.assertRaises(InvalidTransaction):
+            self.apply('alice', action=SupplyChainPayload.UPDATE_PROPERTIES_BULK,
+                       update_properties_bulk=UpdatePropertiesBulkAction(updates=[
+                           UpdatePropertiesAction(record_id='p1', properties=[_number('temperature', 4)]),
+                           UpdatePropertiesAction(record_id='missing', properties=[_number('temperature', 5)]),
+                       ]))
+
+        self.assertEqual(len(self.context.set_calls), writes, "Nothing of an invalid bulk is written.")
+        self.assertEqual(self.reported_values('p1', 'temperature'), [], "No record is updated.")
+
+    def test_update_properties_bulk_empty(self):
+        with self.assertRaises(InvalidTransaction):
+            self.apply('alice', action=SupplyChainPayload.UPDATE_PROPERTIES_BULK,
+                       update_properties_bulk=UpdatePropertiesBulkAction())
+
+    def test_page_ring(self):
+        self.apply('alice', action=SupplyChainPayload.CREATE_RECORD_TYPE,
+                   create_record_type=CreateRecordTypeAction(name='Sensor', properties=[
+                       PropertySchema(name='reading', data_type=PropertySchema.NUMBER, page_size=2, page_count=3)]))
+        self.apply('alice', action=SupplyChainPayload.CREATE_RECORD,
+                   create_record=CreateRecordAction(record_id='s1', record_type='Sensor'))
+
+        for value in range(7):
+            self.apply('alice', action=SupplyChainPayload.UPDATE_PROPERTIES,
+                       update_properties=UpdatePropertiesAction(record_id='s1', properties=[_number('reading', value)]))
+
+        self.assertEqual([self.reported_values('s1', 'reading', page_number) for page_number in (1, 2, 3)],
+                         [[6], [2, 3], [4, 5]],
+                         "Pages hold page_size values, and the ring wraps back to page 1 after page_count pages.")
+        self.assertNotIn(addresser.get_property_address('s1', 'reading', 4), self.context.data,
+                         "No page beyond page_count is created.")
+
+        prop = self.get(PropertyContainer, addresser.get_property_address('s1', 'reading')).entries[0]
+        self.assertEqual((prop.current_page, prop.wrapped), (1, True), "The property records the wrap.")
+
+    def test_page_size_limit(self):
+        with self.assertRaises(InvalidTransaction):
+            self.apply('alice', action=SupplyChainPayload.CREATE_RECORD_TYPE,
+                       create_record_type=CreateRecordTypeAction(name='Sensor', properties=[
+                           PropertySchema(name='reading', data_type=PropertySchema.NUMBER,
+                                          page_size=PROPERTY_PAGE_LENGTH_LIMIT + 1)]))
+
+    def test_single_page_ring(self):
+        with self.assertRaises(InvalidTransaction):
+            self.apply('alice', action=SupplyChainPayload.CREATE_RECORD_TYPE,
+                       create_record_type=CreateRecordTypeAction(name='Sensor', properties=[
+                           PropertySchema(name='reading', data_type=PropertySchema.NUMBER,
+                                          page_size=1, page_count=1)]))
+
+        self.assertNotIn(addresser.get_record_type_address('Sensor'), self.context.data,
+                         "Record types with a single page ring are rejected.")
@@ -0,0 +1,114 @@
+import os
+import sys
+import unittest
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__)))))
+
+sys.path.insert(0, TOP_DIR)
+sys.path.insert(0, os.path.join(TOP_DIR, 'processors/supply_chain_tp'))
+sys.path.insert(0, os.path.join(TOP_DIR, 'protobuf'))
+
+from addressing.supply_chain_addressers import addresser
+from protobuf.supply_chain_protos.agent_pb2 import Agent, AgentContainer
+from protobuf.supply_chain_protos.record_pb2 import Record, RecordContainer
+
+from mock_context import MockContext
+from state import PrefetchCounter, SupplyChainState
+
+
+class SupplyChainStateTest(unittest.TestCase):
+
+    def setUp(self):
+        self.context = MockContext()
+        self.state = SupplyChainState(self.context)
+
+    def test_containers_are_read_once(self):
+        address = addresser.get_agent_address('alice')
+        self.context.data[address] = AgentContainer(entries=[Agent(public_key='alice')]).SerializeToString()
+
+        first = self.state.get_container(address)
+        second = self.state.get_container(address)
+
+        self.assertIs(first, second, "The same parsed container is returned for repeated lookups.")
+        self.assertEqual(first.entries[0].public_key, 'alice', "The container is parsed from state.")
+        self.assertEqual(self.context.get_calls, [[address]], "The address is read from the validator only once.")
+
+    def test_unset_address(self):
+        address = addresser.get_record_address('missing')
+
+        container = self.state.get_container(address)
+
+        self.assertIsInstance(container, RecordContainer, "An empty container of the right type is returned.")
+        self.assertEqual(len(container.entries), 0, "The container is empty.")
+
+    def test_single_flush(self):
+        agent_address = addresser.get_agent_address('alice')
+        record_address = addresser.get_record_address('record')
+
+        agents = self.state.get_container(agent_address)
+        agents.entries.extend([Agent(public_key='alice')])
+        self.state.set_container(agent_address, agents)
+        records = self.state.get_container(record_address)
+        records.entries.extend([Record(record_id='record')])
+        self.state.set_container(record_address, records)
+        self.state.set_container(record_address, records)
+
+        self.assertEqual(self.context.set_calls, [], "Nothing is written before flush().")
+
+        self.state.flush()
+        self.state.flush()
+
+        self.assertEqual(len(self.context.set_calls), 1, "All changes are written in one set_state call.")
+        self.assertEqual(sorted(self.context.set_calls[0]), sorted([agent_address, record_address]),
+                         "Every modified address is written.")
+        self.assertEqual(self.context.data[record_address], records.SerializeToString(),
+                         "The modified container is written.")
+
+    def test_nothing_to_flush(self):
+        self.state.get_container(addresser.get_agent_address('alice'))
+        self.state.flush()
+
+        self.assertEqual(self.context.set_calls, [], "Containers that were only read are not written.")
+
+
+class PrefetchTest(unittest.TestCase):
+
+    def setUp(self):
+        self.context = MockContext()
+        self.state = SupplyChainState(self.context)
+
+    def test_prefetch_in_one_read(self):
+        agent_address = addresser.get_agent_address('alice')
+        record_address = addresser.get_record_address('record')
+        self.context.data[agent_address] = AgentContainer(entries=[Agent(public_key='alice')]).SerializeToString()
+
+        self.state.prefetch([record_address, agent_address, addresser.make_property_address_range('record')])
+
+        self.assertEqual(self.context.get_calls, [sorted([agent_address, record_address])],
+                         "Full addresses are read in one get_state call, address prefixes are skipped.")
+
+        self.assertEqual(self.state.get_container(agent_address).entries[0].public_key, 'alice',
+                         "The prefetched container is parsed from state.")
+        self.assertEqual(len(self.state.get_container(record_address).entries), 0,
+                         "Unset addresses are prefetched as empty containers.")
+        self.assertEqual(len(self.context.get_calls), 1, "Prefetched addresses are not read again.")
+
+    def test_hits_and_misses(self):
+        declared = addresser.get_agent_address('alice')
+        undeclared = addresser.get_record_address('record')
+
+        self.state.prefetch([declared])
+        self.state.get_container(declared)
+        self.state.get_container(declared)
+        self.state.get_container(undeclared)
+        self.state.get_container(undeclared)
+
+        self.assertEqual((self.state.hits, self.state.misses), (1, 1),
+                         "The first lookup of an address counts as a hit if it was prefetched, else as a miss.")
+
+    def test_counter(self):
+        counter = PrefetchCounter()
+        counter.add(3, 1)
+        counter.add(2, 0)
+
+        self.assertEqual((counter.hits, counter.misses), (5, 1), "Hits and misses are summed up.")
@@ -0,0 +1,189 @@
+import asyncio
+import time
+from typing import Callable, Dict, List, TYPE_CHECKING
+
+import aiohttp
+
+from sawtooth_signing import Signer
+from sawtooth_sdk.protobuf.batch_pb2 import Batch, BatchList
+
+from supply_chain_client.SupplyChainClient import SupplyChainClient
+from supply_chain_client.completion import LatencyHistogram
+from supply_chain_client.crypto import get_new_signer
+
+if TYPE_CHECKING:
+    from supply_chain_client.commit_watcher import CommitWatcher
+
+
+class AsyncSupplyChainClient(SupplyChainClient):
+    """ asyncio version of SupplyChainClient. All reading and writing methods of SupplyChainClient are available,
+        but return awaitables, e.g. `status = await client.update_record(agent, record_id, properties)`.
+
+        All requests share one keep-alive connection pool. At most max_in_flight batches are submitted and not yet
+        processed at any time; further submissions wait for a slot. The statuses of all batches in flight are
+        fetched by a single background poller, which long-polls /batch_statuses?wait=poll_wait for up to
+        max_poll_ids batches per request. Submissions wait at most status_deadline seconds for their batch to be
+        processed, like with SupplyChainClient, and return "PENDING" if it is not. With a started commit_watcher,
+        batches are resolved from block-commit events, and only batches not committed within the watcher's
+        fallback_after seconds are left to the poller.
+
+        Use as `async with AsyncSupplyChainClient(url) as client: ...`, or call start() and close().
+        Narrow address declarations (see SupplyChainClient) are not supported, as they need blocking state queries
+        while building transactions; setting narrow_addresses raises a ValueError. """
+
+    def __init__(self, api_url: str, signer: Signer = None, max_in_flight: int = 1000, pool_size: int = 100,
+                 poll_wait: int = 1, max_poll_ids: int = 500, status_deadline: float = 30.0,
+                 commit_watcher: 'CommitWatcher' = None):
+        # SupplyChainClient.__init__ is not called, as its requests session and CompletionTracker are not used
+        self._api = api_url
+        self._signer = signer if signer is not None else get_new_signer()
+        self.pub_key = self._signer.get_public_key().as_hex()
+        self._latency = LatencyHistogram()
+        self._watcher = commit_watcher
+        self._max_in_flight = max_in_flight
+        self._pool_size = pool_size
+        self._poll_wait = poll_wait
+        self._max_poll_ids = max_poll_ids
+        self._status_deadline = status_deadline
+        self._session = None
+        self._in_flight = None
+        self._pending: Dict[str, asyncio.Future] = {}
+        self._poller = None
+
+    @property
+    def commit_latency(self):
+        return self._latency
+
+    @property
+    def narrow_addresses(self) -> bool:
+        return False
+
+    @narrow_addresses.setter
+    def narrow_addresses(self, narrow_addresses: bool):
+        if narrow_addresses:
+            raise ValueError("AsyncSupplyChainClient does not support narrow address declarations")
+
+    async def __aenter__(self):
+        await self.start()
+        return self
+
+    async def __aexit__(self, *exc_info):
+        await self.close()
+
+    async def start(self):
+        """ Opens the connection pool. Has to be called from within the event loop the client is used in. """
+        if self._session is None:
+            connector = aiohttp.TCPConnector(limit=self._pool_size)
+            self._session = aiohttp.ClientSession(connector=connector)
+            self._in_flight = asyncio.Semaphore(self._max_in_flight)
+
+    async def close(self):
+        """ Stops the poller and closes the connection pool. Submissions still waiting for their batch status
+            raise a ConnectionError. """
+        if self._poller is not None:
+            self._poller.cancel()
+            self._poller = None
+        pending, self._pending = self._pending, {}
+        for future in pending.values():
+            if not future.done():
+                future.set_exception(ConnectionError("Client closed before the batch status was known"))
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
+
+    async def query_state(self, address: str):
+        """ Gets the state stored at an address on the blockchain.
+            Returns None if no state is stored for the provided address. """
+        await self.start()
+        async with self._session.get(f"{self._api}/state/{address}") as response:
+            if response.status == 200:
+                return await response.json()
+            elif response.status == 404:
+                return None
+            else:
+                print(f"Some error occurred when posting to API.\nCode: {response.status}\n"
+                      f"Text: {await response.text()}")
+                return None
+
+    async def _get_instance(self, address: str, container_class, predicate: Callable):
+        return self._instance_from_response(await self.query_state(address), container_class, predicate)
+
+    async def _submit_batch(self, batch: Batch) -> str:
+        """ Posts a single batch once there is room in the in-flight window, then waits for its final status.
+            Returns "PENDING" if the batch is not processed within status_deadline seconds. """
+        await self.start()
+        async with self._in_flight:
+            batch_id = batch.header_signature
+            committed = self._watcher.watch(batch_id) if self._watcher is not None else None
+
+            submitted_at = time.monotonic()
+            deadline = submitted_at + self._status_deadline
+            if not await self._send_batches(BatchList(batches=[batch]).SerializeToString()):
+                if committed is not None:
+                    self._watcher.forget(batch_id)
+                return "INVALID"
+
+            status = None
+            if committed is not None:
+                try:
+                    status = await asyncio.wait_for(
+                        asyncio.shield(asyncio.wrap_future(committed)),
+                        max(0.0, min(self._watcher.fallback_after if self._watcher.is_active else 0.0,
+                                     deadline - time.monotonic())))
+                except asyncio.TimeoutError:
+                    self._watcher.forget(batch_id)
+
+            if status is None:
+                future = asyncio.get_running_loop().create_future()
+                self._pending[batch_id] = future
+                self._ensure_poller()
+                try:
+                    status = await asyncio.wait_for(future, max(0.0, deadline - time.monotonic()))
+                except asyncio.TimeoutError:
+                    self._pending.pop(batch_id, None)
+                    return "PENDING"
+
+            self.commit_latency.observe(time.monotonic() - submitted_at)
+            return status
+
+    async def _send_batches(self, batch_list):
+        """ Posts batches to the blockchain (via the sawtooth-rest-api) """
+        url = f"{self._api}/batches"
+        headers = {'Content-Type': 'application/octet-stream'}
+        async with self._session.post(url, data=batch_list, headers=headers) as response:
+            if response.status >= 400:
+                print(f"Error when posting to API.\n Code: {response.status}\nText: {await response.text()}")
+            else:
+                return await response.json()
+
+    def _ensure_poller(self):
+        if self._poller is None or self._poller.done():
+            self._poller = asyncio.ensure_future(self._poll())
+
+    async def _poll(self):
+        """ Resolves the futures of all pending batches, asking for many batch statuses per request.
+            Exits once nothing is pending; the next submission starts a new poller. """
+        while self._pending:
+            batch_ids = list(self._pending)
+            for i in range(0, len(batch_ids), self._max_poll_ids):
+                try:
+                    self._resolve(await self._batch_statuses(batch_ids[i:i + self._max_poll_ids]))
+                except Exception as err:
+                    # A failed request or malformed response must not end the poller, which would leave every
+                    # pending submission waiting forever; its batches are asked for again in the next round
+                    print(f"Error when polling batch statuses: {err!r}")
+                    await asyncio.sleep(min(1.0, self._poll_wait))
+
+    def _resolve(self, statuses: List[dict]):
+        for status in statuses:
+            if status['status'] == "PENDING":
+                continue
+            future = self._pending.pop(status['id'], None)
+            if future is not None and not future.done():
+                future.set_result(status['status'])
+
+    async def _batch_statuses(self, batch_ids: List[str]) -> List[dict]:
+        async with self._session.post(f"{self._api}/batch_statuses", params={'wait': max(1, int(self._poll_wait))},
+                                      json=batch_ids) as response:
+            response.raise_for_status()
+            return (await response.json())['data']
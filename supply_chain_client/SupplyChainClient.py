@@ -2,7 +2,8 @@ import base64
 import random
 from hashlib import sha512
 import time
-from typing import List, Callable
+from collections import Counter
+from typing import List, Callable, Tuple, Iterable, TYPE_CHECKING
 
 import requests
 
@@ -11,63 +12,86 @@ from sawtooth_sdk.protobuf.batch_pb2 import BatchHeader, Batch, BatchList
 from sawtooth_signing import Signer
 
 from addressing.supply_chain_addressers.addresser import FAMILY_NAME, FAMILY_VERSION, get_agent_address, \
-    get_record_address, get_property_address, make_property_address_range
+    get_record_address, get_property_address, make_property_prefix
 
+from supply_chain_client.completion import CompletionTracker
 from supply_chain_client.crypto import get_new_signer
 from supply_chain_client.protobuf.agent_pb2 import AgentContainer
 from supply_chain_client.protobuf.record_pb2 import RecordContainer
 from supply_chain_client.protobuf.property_pb2 import PropertyValue, PropertyContainer, PropertyPageContainer
-from supply_chain_client.protobuf.payload_pb2 import SupplyChainPayload, UpdatePropertiesAction
+from supply_chain_client.protobuf.payload_pb2 import SupplyChainPayload, UpdatePropertiesAction, \
+    CreateRecordsBulkAction, CreateRecordAction, UpdatePropertiesBulkAction
 
 from supply_chain_client.models.item import BlockchainItem
+from supply_chain_client.models.record import RecordItem
 from supply_chain_client.models.record_type import RecordTypeItem
 from supply_chain_client.models.agent import AgentItem
 from supply_chain_client.utils import first_or_none
 
+if TYPE_CHECKING:
+    from supply_chain_client.commit_watcher import CommitWatcher
+
+# Same as in the transaction processor: the number of pages a property has when page_count is not set
+TOTAL_PROPERTY_PAGE_MAX = 16 ** 4 - 1
+
 
 class SupplyChainClient:
 
-    def __init__(self, api_url: str, signer: Signer = None):
+    def __init__(self, api_url: str, signer: Signer = None, narrow_addresses: bool = False,
+                 status_deadline: float = 30.0, commit_watcher: 'CommitWatcher' = None):
+        """ With narrow_addresses, property updates declare the exact property and page addresses they touch,
+            which costs one state query per updated property. Otherwise they declare one address prefix per
+            property. Either way, updates of different properties of a record can be scheduled in parallel.
+            Narrow declarations are based on the property's state when the transaction is built, and allow for
+            the updates in the transaction and those this client knows to be in flight (see BatchBuilder).
+            Updates of the same property submitted concurrently by other clients or threads can move its page
+            further, making the transaction invalid; only use narrow_addresses for properties with one writer.
+            Submissions wait at most status_deadline seconds for their batch to be processed. A started
+            commit_watcher is notified of committed batches by the validator instead of polling the REST API. """
         self._api = api_url
         self._signer = signer if signer is not None else get_new_signer()
         self.pub_key = self._signer.get_public_key().as_hex()
+        self.narrow_addresses = narrow_addresses
+        self._session = requests.Session()
+        self._tracker = CompletionTracker(api_url, self._session, status_deadline, commit_watcher=commit_watcher)
+
+    @property
+    def commit_latency(self):
+        """ Histogram of the time between posting a batch and it reaching a final status. """
+        return self._tracker.latency
 
     def get_agent(self, public_key: str):
         """ Get Agent object, as defined in agent.proto, from on public_key.
             Returns None if no agent with the public_key is found. """
         address = get_agent_address(public_key)
-        response = self.query_state(address)
         predicate = lambda a: a.public_key == public_key
-        return self._instance_from_response(response, AgentContainer, predicate)
+        return self._get_instance(address, AgentContainer, predicate)
 
     def get_record(self, record_id: str):
         """ Get Record, as defined in record.proto, based on record_id.
             Returns None if no record with the record_id is found. """
         address = get_record_address(record_id)
-        response = self.query_state(address)
         predicate = lambda r: r.record_id == record_id
-        return self._instance_from_response(response, RecordContainer, predicate)
+        return self._get_instance(address, RecordContainer, predicate)
 
     def get_property(self, record_id: str, property_name: str):
         """ Get Property, as defined in record.proto from record_id and property_name.
             Returns None if no property is found. """
         address = get_property_address(record_id, property_name)
-        response = self.query_state(address)
         predicate = lambda p: p.record_id == record_id and p.name == property_name
-        return self._instance_from_response(response, PropertyContainer, predicate)
+        return self._get_instance(address, PropertyContainer, predicate)
 
     def get_property_page(self, record_id: str, property_name: str, page_num: int):
         """ Get PropertyPage, as defined in property.proto, from record_id, property_name, and page_num.
             Returns None if page is not found. """
         address = get_property_address(record_id, property_name, page_num)
-        response = self.query_state(address)
         predicate = lambda pp: pp.record_id == record_id and pp.name == property_name
-        return self._instance_from_response(response, PropertyPageContainer, predicate)
+        return self._get_instance(address, PropertyPageContainer, predicate)
 
     def query_state(self, address: str):
         """ Gets the state stored at an address on the blockchain.
             Returns None if no state is stored for the provided address. """
-        response = requests.get(f"{self._api}/state/{address}")
+        response = self._session.get(f"{self._api}/state/{address}")
         if response.ok:
             return response.json()
         elif response.status_code == 404:
@@ -91,17 +115,62 @@ class SupplyChainClient:
             item = agent
         payload = item.creation_payload
         header = self._create_transaction_header(
-            item.creation_addresses,
-            item.creation_addresses,
+            [agent.address, *item.creation_addresses],
+            item.creation_outputs,
             payload, agent)
         return self._send_payload(payload, header, agent)
 
+    def add_records(self, agent: AgentItem, records: List[RecordItem]):
+        """ Add many records of the same record type in a single transaction.
+            The transaction is only valid if every record in it is. """
+        payload = self._create_bulk_records_payload(records)
+        inputs = [agent.address, *(address for record in records for address in record.creation_addresses)]
+        outputs = [address for record in records for address in record.creation_outputs]
+        header = self._create_transaction_header(inputs, outputs, payload, agent)
+        return self._send_payload(payload, header, agent)
+
     def update_record(self, agent: AgentItem, record_id: str, properties: List[PropertyValue]):
         payload = self._create_update_payload(record_id, properties)
-        address = [get_record_address(record_id), make_property_address_range(record_id)]
-        header = self._create_transaction_header(address, address, payload, agent)
+        outputs = self._property_update_addresses((record_id, p.name) for p in properties)
+        inputs = [get_record_address(record_id), *outputs]
+        header = self._create_transaction_header(inputs, outputs, payload, agent)
+        return self._send_payload(payload, header, agent)
+
+    def update_records(self, agent: AgentItem, updates: List[Tuple[str, List[PropertyValue]]]):
+        """ Update the properties of many records in a single transaction.
+            updates is a list of (record_id, properties) pairs. """
+        payload = self._create_bulk_update_payload(updates)
+        outputs = self._property_update_addresses(
+            (record_id, p.name) for record_id, properties in updates for p in properties)
+        inputs = [*(get_record_address(record_id) for record_id, _ in updates), *outputs]
+        header = self._create_transaction_header(inputs, outputs, payload, agent)
         return self._send_payload(payload, header, agent)
 
+    def _property_update_addresses(self, updates: Iterable[Tuple[str, str]]) -> List[str]:
+        """ Returns the addresses a transaction updating the given (record_id, property name) pairs may read or
+            write. A pair appears once per update of the property in the transaction. """
+        addresses = []
+        for (record_id, name), count in Counter(updates).items():
+            prop = self.get_property(record_id, name) if self.narrow_addresses else None
+            if prop is not None:
+                # Every update may fill the page it goes to and move the property on to the next one, so the
+                # updates of this transaction and those applied before it may touch this many pages after the
+                # current one
+                moves = count + self._updates_in_flight(record_id, name)
+                page_count = prop.page_count or TOTAL_PROPERTY_PAGE_MAX
+                if moves < page_count - 1:
+                    pages = [(prop.current_page - 1 + i) % page_count + 1 for i in range(moves + 1)]
+                    addresses.append(get_property_address(record_id, name))
+                    addresses.extend(get_property_address(record_id, name, page) for page in pages)
+                    continue
+            addresses.append(make_property_prefix(record_id, name))
+        return addresses
+
+    def _updates_in_flight(self, record_id: str, property_name: str) -> int:
+        """ Returns the number of updates of a property this client has submitted that may not have been applied
+            yet. Transactions are submitted one at a time and waited for, so there are none. """
+        return 0
+
     @staticmethod
     def _create_update_payload(record_id: str, properties: List[PropertyValue]) -> str:
         """ Returns the payload for updating a records properties serialized to a string. """
@@ -113,23 +182,66 @@ class SupplyChainClient:
             update_properties=action
         ).SerializeToString()
 
+    @staticmethod
+    def _create_bulk_update_payload(updates: List[Tuple[str, List[PropertyValue]]]) -> str:
+        """ Returns the payload for updating the properties of many records serialized to a string. """
+        action = UpdatePropertiesBulkAction()
+        for record_id, properties in updates:
+            record_update = action.updates.add(record_id=record_id)
+            record_update.properties.extend(properties)
+        return SupplyChainPayload(
+            action=SupplyChainPayload.Action.UPDATE_PROPERTIES_BULK,
+            timestamp=int(time.time()),
+            update_properties_bulk=action
+        ).SerializeToString()
+
+    @staticmethod
+    def _create_bulk_records_payload(records: List[RecordItem]) -> str:
+        """ Returns the payload for creating many records of one type serialized to a string. """
+        record_types = {record.record_type.name for record in records}
+        if len(record_types) != 1:
+            raise ValueError("Records created in bulk must all have the same record type.")
+
+        action = CreateRecordsBulkAction(record_type=record_types.pop())
+        action.records.extend(
+            CreateRecordAction(record_id=record.record_id, properties=record.properties)
+            for record in records)
+        return SupplyChainPayload(
+            action=SupplyChainPayload.Action.CREATE_RECORDS_BULK,
+            timestamp=int(time.time()),
+            create_records_bulk=action
+        ).SerializeToString()
+
     def _send_payload(self, payload, header, agent):
         transaction = Transaction(
             header=header,
             header_signature=agent.sign(header),
             payload=payload)
 
-        batch = self._create_batch(transaction)
+        return self._submit_transaction(transaction)
+
+    def _submit_transaction(self, transaction: Transaction):
+        """ Submits a transaction in a batch of its own. """
+        return self._submit_batch(self._create_batch(transaction))
+
+    def _submit_batch(self, batch: Batch):
+        """ Posts a single batch and waits for it to be processed. Returns the batch status, which is "PENDING"
+            if the batch was not processed within the status deadline. """
+        batch_id = batch.header_signature
         batch_list = BatchList(batches=[batch]).SerializeToString()
-        return self._wait_till_processed(self._send_batches(batch_list))
+        self._tracker.submitting([batch_id])
+        if self._send_batches(batch_list) is None:
+            self._tracker.discard([batch_id])
+            return "INVALID"
+        return self._tracker.wait([batch_id])[batch_id]['status']
 
     def _create_transaction_header(self, inputs, outputs, payload, agent) -> str:
         """ Returns transaction header serialized to string. """
         return TransactionHeader(
             family_name=FAMILY_NAME,
             family_version=FAMILY_VERSION,
-            inputs=list({agent.address, *inputs}),
-            outputs=list({*outputs}),
+            inputs=sorted({*inputs}),
+            outputs=sorted({*outputs}),
             signer_public_key=agent.public_key,
             batcher_public_key=self.pub_key,
             dependencies=[],
@@ -137,37 +249,34 @@ class SupplyChainClient:
             nonce=hex(random.randint(0, 2 ** 64))
         ).SerializeToString()
 
-    def _create_batch(self, transaction) -> Batch:
-        batch_header = BatchHeader(
-            signer_public_key=self.pub_key,
-            transaction_ids=[transaction.header_signature],
-        ).SerializeToString()
-
+    def _create_batch(self, *transactions: Transaction) -> Batch:
+        batch_header = self._create_batch_header(*transactions)
         return Batch(
             header=batch_header,
             header_signature=self._signer.sign(batch_header),
-            transactions=[transaction]
+            transactions=transactions
         )
 
+    def _create_batch_header(self, *transactions: Transaction) -> str:
+        """ Returns batch header serialized to string. """
+        return BatchHeader(
+            signer_public_key=self.pub_key,
+            transaction_ids=[t.header_signature for t in transactions],
+        ).SerializeToString()
+
     def _send_batches(self, batch_list):
         """ Posts batches to the blockchain (via the sawtooth-rest-api) """
         url = f"{self._api}/batches"
         headers = {'Content-Type': 'application/octet-stream'}
-        response = requests.post(url, data=batch_list, headers=headers)
+        response = self._session.post(url, data=batch_list, headers=headers)
         if not response.ok:
             print(f"Error when posting to API.\n Code: {response.status_code}\nText: {response.text}")
         else:
             return response.json()
 
-    def _wait_till_processed(self, resp, retry=0) -> str:
-        """ Queries the status link for a transaction until the transaction is no longer marked as "PENDING".
-            Max retries are 5, with exponential backoff between them. After that "PENDING" is returned. """
-        time.sleep(0.1 + 0.1 * retry)
-        r = requests.get(url=resp['link'])
-        status = r.json()['data'][0]['status']
-        if status == "PENDING" and retry < 5:
-            return self._wait_till_processed(resp, retry + 1)
-        return status
+    def _get_instance(self, address: str, container_class, predicate: Callable):
+        """ Gets the instance matching predicate from the container stored at address. """
+        return self._instance_from_response(self.query_state(address), container_class, predicate)
 
     @staticmethod
     def _instance_from_response(response, container_class, predicate: Callable):
@@ -0,0 +1,208 @@
+import threading
+import time
+from collections import Counter
+from typing import Dict, Iterable, List, Optional, Tuple, TYPE_CHECKING
+
+from sawtooth_signing import Signer
+from sawtooth_sdk.protobuf.batch_pb2 import Batch, BatchList
+from sawtooth_sdk.protobuf.transaction_pb2 import Transaction
+
+from supply_chain_client.SupplyChainClient import SupplyChainClient
+from supply_chain_client.crypto import SigningPool, sign_all
+
+if TYPE_CHECKING:
+    from supply_chain_client.commit_watcher import CommitWatcher
+
+
+class PendingTransaction:
+    """ Result handle of a transaction added to a BatchBuilder. transaction_id and batch_id are None until the
+        transaction's batch is signed and posted. status is None until the transaction's batch has been processed,
+        then the status of the batch ("COMMITTED", "INVALID", ...). message holds the validator's reason when this
+        transaction is the one that made its batch invalid. """
+
+    def __init__(self):
+        self.transaction_id: Optional[str] = None
+        self.batch_id: Optional[str] = None
+        self.status: Optional[str] = None
+        self.message: Optional[str] = None
+        # The (record_id, property name) pairs the transaction updates
+        self._updates: List[Tuple[str, str]] = []
+
+    def __repr__(self):
+        return f"PendingTransaction({(self.transaction_id or '')[:16]}..., status={self.status})"
+
+
+class BatchBuilder(SupplyChainClient):
+    """ Collects the transactions created by add, add_agent, add_record_type, add_records, update_record and
+        update_records into batches instead of submitting each one on its own. These methods return a
+        PendingTransaction instead of a status.
+
+        A batch is sealed when it holds batch_size transactions, or max_age seconds after its first transaction
+        was added. Sealed batches are posted batches_per_list at a time in one BatchList; a batch sealed by age is
+        posted right away, from a timer thread, so that transactions are not held back while traffic is light.
+        flush() seals and posts everything left, wait() blocks until all posted batches are processed.
+        Transactions and batches are signed right before they are posted, all batches of a BatchList together,
+        in parallel when a SigningPool is given.
+        Batches are atomic: if one transaction is invalid, none of the transactions in its batch are applied.
+
+        with BatchBuilder(api_url) as builder:
+            for record_id, properties in readings:
+                builder.update_record(agent, record_id, properties)
+        # everything is posted and processed here """
+
+    def __init__(self, api_url: str, signer: Signer = None, narrow_addresses: bool = False,
+                 batch_size: int = 100, max_age: float = 1.0, batches_per_list: int = 10,
+                 status_deadline: float = 30.0, commit_watcher: 'CommitWatcher' = None,
+                 signing_pool: SigningPool = None):
+        super().__init__(api_url, signer, narrow_addresses, status_deadline, commit_watcher)
+        self.batch_size = batch_size
+        self.max_age = max_age
+        self.batches_per_list = batches_per_list
+        self._sign_all = signing_pool.sign_all if signing_pool is not None else sign_all
+        # Unsigned transactions as (signer, header, payload)
+        self._open: List[Tuple[Signer, bytes, bytes]] = []
+        self._open_pending: List[PendingTransaction] = []
+        self._opened_at = 0.0
+        self._sealed: List[Tuple[List[Tuple[Signer, bytes, bytes]], List[PendingTransaction]]] = []
+        self._posted: Dict[str, List[PendingTransaction]] = {}
+        # Guards the batches against the max_age timer
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        # Property updates of the transactions added and not yet resolved, by (record_id, property name)
+        self._unresolved_updates = Counter()
+        self._next_updates: List[Tuple[str, str]] = []
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, *exc_info):
+        if exc_type is None:
+            self.flush()
+            self.wait()
+
+    def _send_payload(self, payload, header, agent) -> PendingTransaction:
+        with self._lock:
+            if self._open and time.monotonic() - self._opened_at >= self.max_age:
+                self._seal()
+                self._post()
+            if not self._open:
+                self._opened_at = time.monotonic()
+                self._start_timer()
+
+            pending = PendingTransaction()
+            pending._updates, self._next_updates = self._next_updates, []
+            self._unresolved_updates.update(pending._updates)
+            self._open.append((agent.signer, header, payload))
+            self._open_pending.append(pending)
+
+            if len(self._open) >= self.batch_size:
+                self._seal()
+            if len(self._sealed) >= self.batches_per_list:
+                self._post()
+
+            return pending
+
+    def _property_update_addresses(self, updates: Iterable[Tuple[str, str]]) -> List[str]:
+        updates = list(updates)
+        addresses = super()._property_update_addresses(updates)
+        # Claimed by the transaction _send_payload adds next
+        self._next_updates = updates
+        return addresses
+
+    def _updates_in_flight(self, record_id: str, property_name: str) -> int:
+        """ Updates of the property in transactions added to this builder, which are all applied before the next
+            one, unless their batch turns out invalid. """
+        return self._unresolved_updates[record_id, property_name]
+
+    def _start_timer(self):
+        self._timer = threading.Timer(self.max_age, self._post_aged, args=(self._opened_at,))
+        self._timer.daemon = True
+        self._timer.start()
+
+    def _post_aged(self, opened_at: float):
+        """ Seals and posts the open batch when it reaches max_age, unless it was sealed in the meantime. """
+        with self._lock:
+            if self._open and self._opened_at == opened_at:
+                self._seal()
+                self._post()
+
+    def _seal(self):
+        """ Closes the open batch; no further transactions are added to it. """
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._open:
+            return
+        self._sealed.append((self._open, self._open_pending))
+        self._open, self._open_pending = [], []
+
+    def _post(self):
+        """ Posts the sealed batches, batches_per_list per request. """
+        while self._sealed:
+            sealed = self._sealed[:self.batches_per_list]
+            del self._sealed[:self.batches_per_list]
+            batches = self._sign_batches(sealed)
+            for batch, (_, pending) in zip(batches, sealed):
+                self._posted[batch.header_signature] = pending
+
+            batch_ids = [batch.header_signature for batch in batches]
+            batch_list = BatchList(batches=batches).SerializeToString()
+            self._tracker.submitting(batch_ids)
+            if self._send_batches(batch_list) is None:
+                self._tracker.discard(batch_ids)
+                for batch_id in batch_ids:
+                    self._resolve(batch_id, {"status": "INVALID"})
+
+    def _sign_batches(self, sealed) -> List[Batch]:
+        """ Signs the transactions of the sealed batches, then the batches, each in one go. """
+        signatures = iter(self._sign_all(
+            [(signer, header) for unsigned, _ in sealed for signer, header, _ in unsigned]))
+
+        batch_transactions = []
+        for unsigned, pending in sealed:
+            transactions = []
+            for (_, header, payload), transaction in zip(unsigned, pending):
+                transaction.transaction_id = next(signatures)
+                transactions.append(Transaction(
+                    header=header, header_signature=transaction.transaction_id, payload=payload))
+            batch_transactions.append(transactions)
+
+        batch_headers = [self._create_batch_header(*transactions) for transactions in batch_transactions]
+        batch_signatures = self._sign_all([(self._signer, header) for header in batch_headers])
+
+        batches = []
+        for header, signature, transactions, (_, pending) in zip(
+                batch_headers, batch_signatures, batch_transactions, sealed):
+            for transaction in pending:
+                transaction.batch_id = signature
+            batches.append(Batch(header=header, header_signature=signature, transactions=transactions))
+        return batches
+
+    def flush(self) -> List[str]:
+        """ Seals the open batch and posts every sealed batch. Returns the ids of the batches awaiting a status. """
+        with self._lock:
+            self._seal()
+            self._post()
+            return list(self._posted)
+
+    def wait(self, deadline: float = None) -> List[PendingTransaction]:
+        """ Waits until every posted batch has been processed, or until deadline seconds (by default the
+            status_deadline) have passed. Returns the transactions that were resolved by this call. """
+        with self._lock:
+            batch_ids = list(self._posted)
+        resolved = []
+        for batch_id, status in self._tracker.wait(batch_ids, deadline).items():
+            if status['status'] != "PENDING":
+                with self._lock:
+                    resolved.extend(self._resolve(batch_id, status))
+        return resolved
+
+    def _resolve(self, batch_id: str, status: dict) -> List[PendingTransaction]:
+        pending = self._posted.pop(batch_id, [])
+        messages = {t['id']: t.get('message') for t in status.get('invalid_transactions', [])}
+        for transaction in pending:
+            transaction.status = status['status']
+            transaction.message = messages.get(transaction.transaction_id)
+            self._unresolved_updates.subtract(transaction._updates)
+        self._unresolved_updates += Counter()  # drops the properties without unresolved updates
+        return pending
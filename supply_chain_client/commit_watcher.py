@@ -0,0 +1,140 @@
+import logging
+import threading
+from concurrent.futures import Future
+from typing import Dict
+
+from sawtooth_sdk.messaging.stream import Stream
+from sawtooth_sdk.protobuf.block_pb2 import BlockHeader
+from sawtooth_sdk.protobuf.client_block_pb2 import ClientBlockGetByIdRequest, ClientBlockGetResponse
+from sawtooth_sdk.protobuf.client_event_pb2 import ClientEventsSubscribeRequest, ClientEventsSubscribeResponse, \
+    ClientEventsUnsubscribeRequest, ClientEventsUnsubscribeResponse
+from sawtooth_sdk.protobuf.events_pb2 import EventList, EventSubscription
+from sawtooth_sdk.protobuf.validator_pb2 import Message
+
+LOGGER = logging.getLogger(__name__)
+
+# Seconds to wait for the validator to answer a block lookup
+BLOCK_LOOKUP_TIMEOUT = 10.0
+
+
+class CommitWatcher:
+    """ Resolves submitted batches from the validator's block-commit events instead of polling the REST API.
+
+        Subscribes to sawtooth/block-commit events, like ledger_sync's Subscriber does, and looks up the batch ids
+        of every committed block. The future returned by watch() gets the result "COMMITTED" as soon as the block
+        holding the batch is committed. Invalid batches are never committed, so clients fall back to asking the
+        REST API for the status of batches that are not committed within fallback_after seconds.
+        If receiving events fails, the watcher stops and is_active turns False, so clients go back to polling
+        right away instead of waiting fallback_after seconds for every batch.
+
+        watcher = CommitWatcher('tcp://validator:4004')
+        watcher.start()
+        client = SupplyChainClient(api_url, commit_watcher=watcher) """
+
+    def __init__(self, validator_url: str, fallback_after: float = 5.0):
+        self._stream = Stream(validator_url)
+        self.fallback_after = fallback_after
+        self._futures: Dict[str, Future] = {}
+        self._lock = threading.Lock()
+        self._thread = None
+        self._is_active = False
+
+    @property
+    def is_active(self) -> bool:
+        """ Whether block-commit events are being received. """
+        return self._is_active
+
+    def watch(self, batch_id: str) -> Future:
+        """ Returns a future that is resolved when the batch is committed. Call before posting the batch. """
+        with self._lock:
+            future = self._futures.get(batch_id)
+            if future is None:
+                future = self._futures[batch_id] = Future()
+            return future
+
+    def forget(self, batch_id: str):
+        """ Stops watching a batch, e.g. once its status has been found some other way. """
+        with self._lock:
+            self._futures.pop(batch_id, None)
+
+    def start(self):
+        """ Subscribes to block-commit events and handles them on a background thread. """
+        self._stream.wait_for_ready()
+
+        request = ClientEventsSubscribeRequest(
+            subscriptions=[EventSubscription(event_type='sawtooth/block-commit')])
+        response_future = self._stream.send(
+            Message.CLIENT_EVENTS_SUBSCRIBE_REQUEST,
+            request.SerializeToString())
+        response = ClientEventsSubscribeResponse()
+        response.ParseFromString(response_future.result().content)
+
+        if response.status != ClientEventsSubscribeResponse.OK:
+            raise RuntimeError(
+                'Subscription failed with status: {}'.format(
+                    ClientEventsSubscribeResponse.Status.Name(response.status)))
+
+        self._is_active = True
+        self._thread = threading.Thread(target=self._receive, name='CommitWatcher', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        """ Unsubscribes from block-commit events and closes the stream's connection. """
+        self._is_active = False
+
+        request = ClientEventsUnsubscribeRequest()
+        response_future = self._stream.send(
+            Message.CLIENT_EVENTS_UNSUBSCRIBE_REQUEST,
+            request.SerializeToString())
+        response = ClientEventsUnsubscribeResponse()
+        response.ParseFromString(response_future.result().content)
+
+        self._stream.close()
+
+    def _receive(self):
+        while self._is_active:
+            try:
+                message_future = self._stream.receive()
+
+                event_list = EventList()
+                event_list.ParseFromString(message_future.result().content)
+            except Exception:
+                if self._is_active:
+                    LOGGER.exception('Failed to receive block-commit events, no longer watching commits')
+                    self._is_active = False
+                return
+
+            for event in event_list.events:
+                if event.event_type == 'sawtooth/block-commit':
+                    try:
+                        block_id = next(a.value for a in event.attributes if a.key == 'block_id')
+                        self._resolve_block(block_id)
+                    except Exception:
+                        # The batches of this block are left to the clients' fallback to polling
+                        LOGGER.exception('Failed to resolve the batches of a committed block')
+
+    def _resolve_block(self, block_id: str):
+        with self._lock:
+            if not self._futures:
+                return
+
+        request = ClientBlockGetByIdRequest(block_id=block_id)
+        response_future = self._stream.send(
+            Message.CLIENT_BLOCK_GET_BY_ID_REQUEST,
+            request.SerializeToString())
+        response = ClientBlockGetResponse()
+        response.ParseFromString(response_future.result(BLOCK_LOOKUP_TIMEOUT).content)
+
+        if response.status != ClientBlockGetResponse.OK:
+            LOGGER.warning('Failed to fetch committed block %s', block_id)
+            return
+
+        header = BlockHeader()
+        header.ParseFromString(response.block.header)
+
+        with self._lock:
+            committed = [self._futures.pop(batch_id) for batch_id in header.batch_ids if batch_id in self._futures]
+
+        for future in committed:
+            if not future.done():
+                future.set_result("COMMITTED")
@@ -0,0 +1,143 @@
+import bisect
+import time
+from concurrent.futures import TimeoutError, as_completed
+from typing import Dict, Iterable, List
+
+import requests
+
+# Upper bounds, in seconds, of the commit latency histogram buckets
+LATENCY_BUCKETS = (0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, float("inf"))
+
+
+class LatencyHistogram:
+    """ Counts end-to-end commit latencies (submission to final batch status) in fixed buckets. """
+
+    def __init__(self, buckets=LATENCY_BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * len(buckets)
+        self.count = 0
+        self.total = 0.0
+
+    def observe(self, seconds: float):
+        self.counts[bisect.bisect_left(self.buckets, seconds)] += 1
+        self.count += 1
+        self.total += seconds
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else 0.0
+
+    def percentile(self, q: float) -> float:
+        """ Upper bound of the bucket holding the q-th percentile (0 < q <= 100). """
+        rank = q / 100 * self.count
+        seen = 0
+        for bound, count in zip(self.buckets, self.counts):
+            seen += count
+            if count and seen >= rank:
+                return bound
+        return 0.0
+
+    def __str__(self):
+        lines = [f"{self.count} batches, mean {self.mean:.3f}s, p50 <= {self.percentile(50)}s, "
+                 f"p99 <= {self.percentile(99)}s"]
+        lines.extend(f"  <= {bound:>6}s: {count}" for bound, count in zip(self.buckets, self.counts) if count)
+        return "\n".join(lines)
+
+
+class CompletionTracker:
+    """ Waits for submitted batches to reach a final status (anything but "PENDING").
+
+        Statuses are fetched with the REST API's long-polling /batch_statuses?wait=N, which only returns once all
+        requested batches are final or N seconds have passed. The ids of all batches being waited for are sent
+        together, up to max_ids per request. Waiting gives up after deadline seconds; batches that are still not
+        final are then reported as "PENDING".
+
+        With a started CommitWatcher, batches are resolved from block-commit events instead, and only batches that
+        are not committed within the watcher's fallback_after seconds are looked up via /batch_statuses. """
+
+    def __init__(self, api_url: str, session: requests.Session = None, deadline: float = 30.0,
+                 wait: int = 5, max_ids: int = 500, commit_watcher=None):
+        self._api = api_url
+        self._session = session if session is not None else requests.Session()
+        self._watcher = commit_watcher
+        self.deadline = deadline
+        self.wait_seconds = wait
+        self.max_ids = max_ids
+        self.latency = LatencyHistogram()
+        self._submitted_at: Dict[str, float] = {}
+
+    def submitting(self, batch_ids: Iterable[str]):
+        """ Marks the time the batches are posted, to measure their commit latency. Call right before posting,
+            so that the commit watcher cannot miss the block that commits them. """
+        now = time.monotonic()
+        for batch_id in batch_ids:
+            self._submitted_at[batch_id] = now
+            if self._watcher is not None:
+                self._watcher.watch(batch_id)
+
+    def discard(self, batch_ids: Iterable[str]):
+        """ Stops tracking batches that could not be posted. """
+        for batch_id in batch_ids:
+            self._submitted_at.pop(batch_id, None)
+            if self._watcher is not None:
+                self._watcher.forget(batch_id)
+
+    def wait(self, batch_ids: Iterable[str], deadline: float = None) -> Dict[str, dict]:
+        """ Returns the batch status entry (as returned by the REST API) of every batch id. """
+        deadline = time.monotonic() + (self.deadline if deadline is None else deadline)
+        waiting = list(batch_ids)
+        statuses = {}
+
+        if self._watcher is not None:
+            # A watcher that stopped receiving events resolves nothing more, only take what it already resolved
+            fallback_after = self._watcher.fallback_after if self._watcher.is_active else 0.0
+            statuses.update(self._wait_for_commits(
+                waiting, min(fallback_after, deadline - time.monotonic())))
+            waiting = [batch_id for batch_id in waiting if batch_id not in statuses]
+
+        while waiting:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+
+            for i in range(0, len(waiting), self.max_ids):
+                for status in self._fetch(waiting[i:i + self.max_ids], min(self.wait_seconds, remaining)):
+                    if status['status'] != "PENDING":
+                        statuses[status['id']] = status
+                        self._observe(status['id'])
+
+            waiting = [batch_id for batch_id in waiting if batch_id not in statuses]
+
+        for batch_id in waiting:
+            statuses[batch_id] = {'id': batch_id, 'status': "PENDING", 'invalid_transactions': []}
+        return statuses
+
+    def _wait_for_commits(self, batch_ids: List[str], timeout: float) -> Dict[str, dict]:
+        """ Waits for the commit watcher to see the batches committed. Batches it has not seen by then are
+            forgotten by the watcher, as they may be invalid and never get committed. """
+        futures = {self._watcher.watch(batch_id): batch_id for batch_id in batch_ids}
+        statuses = {}
+        try:
+            for future in as_completed(futures, timeout=max(0.0, timeout)):
+                batch_id = futures[future]
+                statuses[batch_id] = {'id': batch_id, 'status': future.result(), 'invalid_transactions': []}
+                self._observe(batch_id)
+        except TimeoutError:
+            for batch_id in futures.values():
+                if batch_id not in statuses:
+                    self._watcher.forget(batch_id)
+        return statuses
+
+    def _fetch(self, batch_ids: List[str], wait: float) -> List[dict]:
+        response = self._session.post(
+            f"{self._api}/batch_statuses", params={'wait': max(1, int(wait))}, json=batch_ids)
+        if not response.ok:
+            print(f"Error when querying batch statuses.\n Code: {response.status_code}\nText: {response.text}")
+            time.sleep(min(1.0, wait))
+            return []
+        return response.json()['data']
+
+    def _observe(self, batch_id: str):
+        submitted_at = self._submitted_at.pop(batch_id, None)
+        if submitted_at is not None:
+            self.latency.observe(time.monotonic() - submitted_at)
@@ -0,0 +1,106 @@
+""" Reports how often transactions in a stream of batches conflict on the addresses they declare.
+
+Two transactions conflict when one of them writes an address the other reads or writes. Addresses may be
+prefixes, so an address conflicts with every address it is a prefix of. The validator's parallel scheduler
+has to run conflicting transactions one after the other, so a high conflict rate means the stream is
+effectively serial.
+
+Usage: python -m supply_chain_client.conflicts [--window N] BATCH_LIST_FILE [BATCH_LIST_FILE ...]
+where every file holds one serialized BatchList, as posted to the REST API's /batches endpoint.
+"""
+import argparse
+from collections import Counter
+from typing import Iterable, List
+
+from sawtooth_sdk.protobuf.batch_pb2 import BatchList
+from sawtooth_sdk.protobuf.transaction_pb2 import TransactionHeader
+
+
+def _overlapping(addresses: Iterable[str], others: Iterable[str]) -> List[str]:
+    """ Returns the addresses in addresses that are a prefix of, or prefixed by, an address in others. """
+    others = list(others)
+    return [a for a in addresses if any(a.startswith(o) or o.startswith(a) for o in others)]
+
+
+class ConflictReport:
+
+    def __init__(self):
+        self.transactions = 0
+        self.conflicting_transactions = 0
+        self.conflicting_pairs = 0
+        self.hot_addresses = Counter()
+
+    @property
+    def conflict_rate(self) -> float:
+        """ Fraction of transactions that conflict with at least one earlier transaction in the window. """
+        return self.conflicting_transactions / self.transactions if self.transactions else 0.0
+
+    def __str__(self):
+        lines = [
+            f"Transactions:              {self.transactions}",
+            f"Conflicting transactions:  {self.conflicting_transactions}",
+            f"Conflicting pairs:         {self.conflicting_pairs}",
+            f"Conflict rate:             {self.conflict_rate:.2%}",
+        ]
+        if self.hot_addresses:
+            lines.append("Most contended addresses:")
+            lines.extend(f"  {address} ({count})" for address, count in self.hot_addresses.most_common(10))
+        return "\n".join(lines)
+
+
+def conflict_report(headers: Iterable[TransactionHeader], window: int = 100) -> ConflictReport:
+    """ Compares every transaction header with the window transactions before it. """
+    report = ConflictReport()
+    recent = []
+
+    for header in headers:
+        inputs, outputs = list(header.inputs), list(header.outputs)
+        conflicts = 0
+        for other_inputs, other_outputs in recent:
+            contended = {*_overlapping(outputs, [*other_inputs, *other_outputs]),
+                         *_overlapping(inputs, other_outputs)}
+            if contended:
+                conflicts += 1
+                report.hot_addresses.update(contended)
+
+        report.transactions += 1
+        report.conflicting_pairs += conflicts
+        if conflicts:
+            report.conflicting_transactions += 1
+
+        recent.append((inputs, outputs))
+        if len(recent) > window:
+            recent.pop(0)
+
+    return report
+
+
+def headers_from_batch_lists(batch_lists: Iterable[bytes]) -> Iterable[TransactionHeader]:
+    """ Yields the transaction headers of serialized BatchLists, in order. """
+    for data in batch_lists:
+        batch_list = BatchList()
+        batch_list.ParseFromString(data)
+        for batch in batch_list.batches:
+            for transaction in batch.transactions:
+                header = TransactionHeader()
+                header.ParseFromString(transaction.header)
+                yield header
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Reports address conflict rates over serialized BatchLists.")
+    parser.add_argument("files", nargs="+", help="Files holding one serialized BatchList each")
+    parser.add_argument("-w", "--window", type=int, default=100,
+                        help="Number of preceding transactions each transaction is compared with")
+    args = parser.parse_args(args)
+
+    def read_files():
+        for path in args.files:
+            with open(path, "rb") as f:
+                yield f.read()
+
+    print(conflict_report(headers_from_batch_lists(read_files()), args.window))
+
+
+if __name__ == "__main__":
+    main()
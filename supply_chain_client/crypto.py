@@ -1,14 +1,84 @@
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from typing import List, Sequence, Tuple
+
 from sawtooth_signing import create_context
 from sawtooth_signing import CryptoFactory
+from sawtooth_signing import Signer
+from sawtooth_signing.secp256k1 import Secp256k1PrivateKey
 
 
 context = create_context('secp256k1')
+factory = CryptoFactory(context)
+
+# Number of signers kept by signer_for_key, per process
+SIGNER_CACHE_SIZE = 1024
 
 
 def get_new_signer(private_key=None):
     if private_key is None:
         private_key = context.new_random_private_key()
-    return CryptoFactory(context).new_signer(private_key)
+    return factory.new_signer(private_key)
+
+
+@lru_cache(maxsize=SIGNER_CACHE_SIZE)
+def signer_for_key(private_key_hex: str) -> Signer:
+    """ Returns the signer of a hex encoded private key, reusing the signer of earlier calls with the same key. """
+    return factory.new_signer(Secp256k1PrivateKey.from_hex(private_key_hex))
+
+
+def private_key_hex(signer: Signer) -> str:
+    return signer._private_key.as_hex()
+
+
+def sign_all(messages: Sequence[Tuple[Signer, bytes]]) -> List[str]:
+    """ Signs every message with its signer on the calling thread. Returns the signatures in order. """
+    return [signer.sign(message) for signer, message in messages]
+
+
+def _sign_chunk(key: str, messages: List[bytes]) -> List[str]:
+    signer = signer_for_key(key)
+    return [signer.sign(message) for message in messages]
+
+
+class SigningPool:
+    """ Signs many messages in parallel across worker processes, as secp256k1 signing is CPU bound and holds the GIL.
+
+        Messages are sent to the workers in chunks of up to chunk_size consecutive messages of the same signer;
+        only the signer's private key is sent along, each worker keeps its own signers per key. Fewer than
+        chunk_size messages are signed on the calling thread, where the round trip to a worker costs more than
+        signing. Signatures are returned in the order of the messages.
+
+        with SigningPool() as pool:
+            signatures = pool.sign_all([(signer, header) for header in headers]) """
+
+    def __init__(self, workers: int = None, chunk_size: int = 64):
+        self._executor = ProcessPoolExecutor(workers)
+        self.chunk_size = chunk_size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def close(self):
+        self._executor.shutdown()
+
+    def sign_all(self, messages: Sequence[Tuple[Signer, bytes]]) -> List[str]:
+        if len(messages) < self.chunk_size:
+            return sign_all(messages)
+
+        keys, chunks = [], []
+        last_signer = None
+        for signer, message in messages:
+            if signer is not last_signer or len(chunks[-1]) >= self.chunk_size:
+                keys.append(private_key_hex(signer))
+                chunks.append([])
+                last_signer = signer
+            chunks[-1].append(message)
+
+        return [signature for chunk in self._executor.map(_sign_chunk, keys, chunks) for signature in chunk]
 
 
 # To get public key for transaction:
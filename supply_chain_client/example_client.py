@@ -16,10 +16,22 @@ class ExampleClient(SupplyChainClient):
         pallet_item = create_fish_pallet(pallet_id, trip_id, specie_name)
         return self.add(agent, pallet_item)
 
+    def add_pallets(self, agent: AgentItem, trip_id: int, pallets: dict):
+        """ Adds all pallets of a trip in one transaction. pallets maps pallet ids to specie names. """
+        pallet_items = [create_fish_pallet(pallet_id, trip_id, specie_name)
+                        for pallet_id, specie_name in pallets.items()]
+        return self.add_records(agent, pallet_items)
+
     def update_temperature(self, agent: AgentItem, record_id: str, temperature: int, location: [int, int]):
         temperature_property = create_temperature(temperature, location)
         return self.update_record(agent, record_id, [temperature_property])
 
+    def update_temperatures(self, agent: AgentItem, readings: dict):
+        """ Reports one reading cycle in one transaction. readings maps record ids to (temperature, location). """
+        updates = [(record_id, [create_temperature(temperature, location)])
+                   for record_id, (temperature, location) in readings.items()]
+        return self.update_records(agent, updates)
+
 
 if __name__ == "__main__":
 
@@ -18,6 +18,10 @@ class AgentItem(BlockchainItem):
     def sign(self, msg):
         return self._signer.sign(msg)
 
+    @property
+    def signer(self):
+        return self._signer
+
     @property
     def creation_payload(self):
         return SupplyChainPayload(
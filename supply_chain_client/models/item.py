@@ -17,3 +17,8 @@ class BlockchainItem(ABC):
     @abstractmethod
     def address(self):
         pass
+
+    @property
+    def creation_outputs(self):
+        """ The addresses written when the item is created. Defaults to all creation addresses. """
+        return self.creation_addresses
@@ -6,7 +6,7 @@ from supply_chain_client.protobuf.payload_pb2 import CreateRecordAction, SupplyC
 
 from supply_chain_client.models.item import BlockchainItem
 from supply_chain_client.models.record_type import RecordTypeItem
-from addressing.supply_chain_addressers.addresser import get_record_address, get_property_address
+from addressing.supply_chain_addressers.addresser import get_record_address, get_property_addresses
 
 
 class RecordItem(BlockchainItem):
@@ -36,11 +36,13 @@ class RecordItem(BlockchainItem):
 
     @property
     def creation_addresses(self):
-        addresses = [self.address, self.record_type.address]
-        for p in self.record_type.properties:
-            addresses.append(get_property_address(self.record_id, p.name))
-            addresses.append(get_property_address(self.record_id, p.name, 1))
-        return addresses
+        return [*self.creation_outputs, self.record_type.address]
+
+    @property
+    def creation_outputs(self):
+        """ The record type is only read, so it is left out of the outputs. """
+        return [self.address, *get_property_addresses(
+            (self.record_id, p.name, page) for p in self.record_type.properties for page in (0, 1))]
 
     @property
     def address(self):
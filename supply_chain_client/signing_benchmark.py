@@ -0,0 +1,45 @@
+""" Measures header signing throughput on the calling thread and in SigningPools of growing size.
+
+Usage: python -m supply_chain_client.signing_benchmark [-n MESSAGES] [--max-workers N] [--chunk-size N]
+Prints signatures per second for every number of worker processes from 1 to max-workers (by default the number
+of cores), next to the single threaded baseline.
+"""
+import argparse
+import os
+import random
+import time
+
+from supply_chain_client.crypto import SigningPool, get_new_signer, sign_all
+
+
+def _rate(sign, messages) -> float:
+    start = time.perf_counter()
+    sign(messages)
+    return len(messages) / (time.perf_counter() - start)
+
+
+def main(args=None):
+    parser = argparse.ArgumentParser(description="Benchmarks signing throughput against the number of processes.")
+    parser.add_argument("-n", "--messages", type=int, default=20000, help="Number of messages to sign per run")
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count(),
+                        help="Largest number of worker processes to try")
+    parser.add_argument("--chunk-size", type=int, default=64, help="Messages sent to a worker at a time")
+    args = parser.parse_args(args)
+
+    signer = get_new_signer()
+    # Roughly the size of a serialized transaction header
+    messages = [(signer, random.getrandbits(8 * 400).to_bytes(400, "big")) for _ in range(args.messages)]
+
+    print(f"{'workers':>8}  {'signatures/s':>12}  speedup")
+    baseline = _rate(sign_all, messages)
+    print(f"{'inline':>8}  {baseline:>12.0f}  1.00")
+
+    for workers in range(1, args.max_workers + 1):
+        with SigningPool(workers, args.chunk_size) as pool:
+            pool.sign_all(messages[:workers * args.chunk_size])  # start the worker processes
+            rate = _rate(pool.sign_all, messages)
+        print(f"{workers:>8}  {rate:>12.0f}  {rate / baseline:.2f}")
+
+
+if __name__ == "__main__":
+    main()
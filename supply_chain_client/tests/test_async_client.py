@@ -0,0 +1,83 @@
+import asyncio
+import os
+import sys
+import unittest
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+sys.path.insert(0, TOP_DIR)
+sys.path.insert(0, os.path.join(TOP_DIR, 'supply_chain_client'))
+
+from sawtooth_sdk.protobuf.batch_pb2 import Batch
+
+from supply_chain_client.AsyncSupplyChainClient import AsyncSupplyChainClient
+
+
+class AsyncSupplyChainClientTest(unittest.IsolatedAsyncioTestCase):
+    """ Submits batches to a stubbed REST API, whose batch statuses are set by the tests. """
+
+    async def asyncSetUp(self):
+        self.client = AsyncSupplyChainClient("http://localhost:8008", status_deadline=1.0)
+        await self.client.start()
+        self.statuses = {}
+        self.status_requests = 0
+
+        async def send_batches(batch_list):
+            return {'link': 'batch_statuses'}
+
+        async def batch_statuses(batch_ids):
+            self.status_requests += 1
+            await asyncio.sleep(0.01)
+            return [{'id': batch_id, 'status': self.statuses.get(batch_id, "PENDING")} for batch_id in batch_ids]
+
+        self.client._send_batches = send_batches
+        self.client._batch_statuses = batch_statuses
+
+    async def asyncTearDown(self):
+        await self.client.close()
+
+    def submit(self, batch_id):
+        return asyncio.ensure_future(self.client._submit_batch(Batch(header_signature=batch_id)))
+
+    async def test_poller_resolves(self):
+        submissions = [self.submit('b1'), self.submit('b2')]
+        await asyncio.sleep(0.05)
+        self.statuses.update({'b1': "COMMITTED", 'b2': "INVALID"})
+
+        self.assertEqual(await asyncio.gather(*submissions), ["COMMITTED", "INVALID"],
+                         "Every submission gets the final status of its batch.")
+        self.assertEqual(self.client.commit_latency.count, 2, "The commit latency of every batch is measured.")
+        self.assertEqual(self.client._pending, {}, "Resolved batches are no longer polled for.")
+
+    async def test_deadline(self):
+        self.assertEqual(await self.submit('b1'), "PENDING",
+                         "Batches not processed within status_deadline are reported as PENDING.")
+        self.assertEqual(self.client._pending, {}, "Batches past the deadline are no longer polled for.")
+
+    async def test_poll_errors(self):
+        self.client._status_deadline = 10.0
+        batch_statuses = self.client._batch_statuses
+        failures = [asyncio.TimeoutError(), KeyError('status')]
+
+        async def failing_batch_statuses(batch_ids):
+            if failures:
+                raise failures.pop(0)
+            return await batch_statuses(batch_ids)
+
+        self.client._batch_statuses = failing_batch_statuses
+        self.statuses['b1'] = "COMMITTED"
+
+        self.assertEqual(await self.submit('b1'), "COMMITTED", "The poller keeps going after failed requests.")
+
+    async def test_close(self):
+        submission = self.submit('b1')
+        await asyncio.sleep(0.05)
+        await self.client.close()
+
+        with self.assertRaises(ConnectionError):
+            await submission
+
+    async def test_narrow_addresses(self):
+        self.assertFalse(self.client.narrow_addresses)
+        with self.assertRaises(ValueError):
+            self.client.narrow_addresses = True
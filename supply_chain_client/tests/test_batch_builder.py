@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+import unittest
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+sys.path.insert(0, TOP_DIR)
+sys.path.insert(0, os.path.join(TOP_DIR, 'supply_chain_client'))
+
+from sawtooth_sdk.protobuf.batch_pb2 import BatchList
+
+from supply_chain_client.batch_builder import BatchBuilder
+from supply_chain_client.models.agent import AgentItem
+
+
+class BatchBuilderTest(unittest.TestCase):
+    """ Posts to a stubbed REST API, recording the BatchLists posted. """
+
+    def make_builder(self, **kwargs):
+        builder = BatchBuilder("http://localhost:8008", **kwargs)
+        self.posted = []
+
+        def send_batches(batch_list):
+            batches = BatchList()
+            batches.ParseFromString(batch_list)
+            self.posted.append(list(batches.batches))
+            return {'link': 'batch_statuses'}
+
+        builder._send_batches = send_batches
+        return builder
+
+    def test_seal_by_size(self):
+        builder = self.make_builder(batch_size=2, batches_per_list=2, max_age=60)
+        agent = AgentItem("agent")
+        pending = [builder.add(agent) for _ in range(5)]
+
+        self.assertEqual([[len(batch.transactions) for batch in batches] for batches in self.posted], [[2, 2]],
+                         "Full batches are posted batches_per_list at a time.")
+        self.assertEqual(len({p.batch_id for p in pending[:4]}), 2, "Transactions share the batch they were sealed in.")
+        self.assertEqual(pending[0].transaction_id, self.posted[0][0].transactions[0].header_signature,
+                         "Posted transactions learn their id.")
+        self.assertIsNone(pending[4].batch_id, "The open batch is not posted yet.")
+
+        self.assertEqual(len(builder.flush()), 3, "flush() posts the open batch.")
+        self.assertEqual(len(self.posted[1][0].transactions), 1, "The open batch is posted as it is.")
+
+    def test_seal_by_age(self):
+        builder = self.make_builder(batch_size=100, batches_per_list=10, max_age=0.05)
+        pending = builder.add(AgentItem("agent"))
+
+        deadline = time.monotonic() + 5
+        while not self.posted and time.monotonic() < deadline:
+            time.sleep(0.01)
+
+        self.assertEqual(len(self.posted), 1, "A batch reaching max_age is posted without further transactions.")
+        self.assertEqual(self.posted[0][0].header_signature, pending.batch_id, "The aged batch is posted.")
+
+    def test_resolve(self):
+        builder = self.make_builder(batch_size=2, batches_per_list=1, max_age=60)
+        agent = AgentItem("agent")
+        first, second = builder.add(agent), builder.add(agent)
+
+        resolved = builder._resolve(first.batch_id, {
+            'id': first.batch_id, 'status': "INVALID",
+            'invalid_transactions': [{'id': second.transaction_id, 'message': "Agent already exists"}]})
+
+        self.assertEqual(resolved, [first, second], "Every transaction of the batch is resolved.")
+        self.assertEqual([(p.status, p.message) for p in resolved],
+                         [("INVALID", None), ("INVALID", "Agent already exists")],
+                         "The validator's message goes to the transaction that made the batch invalid.")
+
+    def test_failed_post(self):
+        builder = self.make_builder(batch_size=1, batches_per_list=1, max_age=60)
+        builder._send_batches = lambda batch_list: None
+
+        pending = builder.add(AgentItem("agent"))
+
+        self.assertEqual(pending.status, "INVALID", "Transactions of batches that could not be posted are invalid.")
+        self.assertEqual(builder.flush(), [], "Nothing is left to wait for.")
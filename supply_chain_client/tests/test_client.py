@@ -0,0 +1,78 @@
+import os
+import sys
+import unittest
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+sys.path.insert(0, TOP_DIR)
+sys.path.insert(0, os.path.join(TOP_DIR, 'supply_chain_client'))
+
+from addressing.supply_chain_addressers.addresser import get_property_address, make_property_prefix
+from supply_chain_client.SupplyChainClient import SupplyChainClient
+from supply_chain_client.batch_builder import BatchBuilder
+from supply_chain_client.models.agent import AgentItem
+from supply_chain_client.protobuf.property_pb2 import Property, PropertySchema, PropertyValue
+
+
+class NarrowAddressesTest(unittest.TestCase):
+    """ Declares property update addresses from stubbed property state. """
+
+    def make_client(self, client_class=SupplyChainClient, current_page=1, page_count=0):
+        client = client_class("http://localhost:8008", narrow_addresses=True)
+        client.get_property = lambda record_id, name: Property(
+            record_id=record_id, name=name, current_page=current_page, page_count=page_count)
+        return client
+
+    def test_single_update(self):
+        client = self.make_client(current_page=4)
+
+        self.assertEqual(client._property_update_addresses([('r', 'temperature')]),
+                         [get_property_address('r', 'temperature'),
+                          get_property_address('r', 'temperature', 4),
+                          get_property_address('r', 'temperature', 5)],
+                         "The property, its current page and the next page are declared.")
+
+    def test_repeated_updates(self):
+        client = self.make_client(current_page=9, page_count=10)
+
+        self.assertEqual(client._property_update_addresses([('r', 'temperature')] * 3),
+                         [get_property_address('r', 'temperature'),
+                          *(get_property_address('r', 'temperature', page) for page in (9, 10, 1, 2))],
+                         "Every update of the property may move it on by one page, wrapping around the ring.")
+
+    def test_whole_ring(self):
+        client = self.make_client(current_page=2, page_count=3)
+
+        self.assertEqual(client._property_update_addresses([('r', 'temperature')] * 2),
+                         [make_property_prefix('r', 'temperature')],
+                         "Updates that may reach every page declare the property's prefix.")
+
+    def test_wide_addresses(self):
+        client = SupplyChainClient("http://localhost:8008")
+
+        self.assertEqual(client._property_update_addresses([('r', 'temperature'), ('r', 'weight')]),
+                         [make_property_prefix('r', 'temperature'), make_property_prefix('r', 'weight')],
+                         "Without narrow_addresses, every property is declared by its prefix.")
+
+    def test_batch_builder_in_flight(self):
+        builder = self.make_client(BatchBuilder, current_page=1)
+        builder.batch_size = 100
+        builder.max_age = 60
+        agent = AgentItem("agent")
+        value = PropertyValue(name='temperature', data_type=PropertySchema.NUMBER, number_value=1)
+
+        builder.update_record(agent, 'r', [value])
+        builder.update_record(agent, 'r', [value])
+
+        self.assertEqual(builder._updates_in_flight('r', 'temperature'), 2,
+                         "Updates added to the builder count as in flight.")
+        self.assertIn(get_property_address('r', 'temperature', 3),
+                      builder._property_update_addresses([('r', 'temperature')]),
+                      "Later updates allow for the pages the unapplied ones may move on.")
+
+        builder._seal()
+        builder._send_batches = lambda batch_list: None
+        builder._post()
+
+        self.assertEqual(builder._updates_in_flight('r', 'temperature'), 0,
+                         "Resolved updates are no longer in flight.")
@@ -0,0 +1,88 @@
+import os
+import sys
+import time
+import unittest
+from types import SimpleNamespace
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+sys.path.insert(0, TOP_DIR)
+sys.path.insert(0, os.path.join(TOP_DIR, 'supply_chain_client'))
+
+from supply_chain_client.completion import CompletionTracker, LatencyHistogram
+
+
+class FakeSession(object):
+    """ Answers POST /batch_statuses like the REST API would, from statuses set by the tests. Batches without a
+        status are PENDING. """
+
+    def __init__(self, statuses=None, status_code=200):
+        self.statuses = statuses if statuses is not None else {}
+        self.status_code = status_code
+        self.requests = []
+
+    def post(self, url, params=None, json=None):
+        self.requests.append((url, params, list(json)))
+        time.sleep(0.01)
+        data = [{'id': batch_id, 'status': self.statuses.get(batch_id, "PENDING"), 'invalid_transactions': []}
+                for batch_id in json]
+        return SimpleNamespace(ok=self.status_code == 200, status_code=self.status_code, text="error",
+                               json=lambda: {'data': data})
+
+
+class CompletionTrackerTest(unittest.TestCase):
+
+    def test_chunks(self):
+        session = FakeSession({f"b{i}": "COMMITTED" for i in range(5)})
+        tracker = CompletionTracker("http://localhost:8008", session=session, wait=5, max_ids=2)
+        batch_ids = [f"b{i}" for i in range(5)]
+        tracker.submitting(batch_ids)
+
+        statuses = tracker.wait(batch_ids)
+
+        self.assertEqual({batch_id: status['status'] for batch_id, status in statuses.items()},
+                         {batch_id: "COMMITTED" for batch_id in batch_ids}, "Every batch gets its final status.")
+        self.assertEqual([batch_ids for _, _, batch_ids in session.requests], [["b0", "b1"], ["b2", "b3"], ["b4"]],
+                         "Batch ids are requested together, at most max_ids per request.")
+        self.assertEqual([params for _, params, _ in session.requests], [{'wait': 5}] * 3,
+                         "Statuses are long-polled.")
+        self.assertEqual(tracker.latency.count, 5, "The commit latency of every batch is measured.")
+
+    def test_deadline(self):
+        session = FakeSession({"b0": "COMMITTED"})
+        tracker = CompletionTracker("http://localhost:8008", session=session, deadline=0.1)
+
+        started = time.monotonic()
+        statuses = tracker.wait(["b0", "b1"])
+
+        self.assertLess(time.monotonic() - started, 2, "Waiting gives up after the deadline.")
+        self.assertEqual(statuses["b0"]['status'], "COMMITTED")
+        self.assertEqual(statuses["b1"], {'id': "b1", 'status': "PENDING", 'invalid_transactions': []},
+                         "Batches that are not final by the deadline are reported as PENDING.")
+
+    def test_failed_requests(self):
+        session = FakeSession({"b0": "COMMITTED"}, status_code=503)
+        tracker = CompletionTracker("http://localhost:8008", session=session)
+
+        statuses = tracker.wait(["b0"], deadline=0.1)
+
+        self.assertEqual(statuses["b0"]['status'], "PENDING", "Statuses that could not be fetched are PENDING.")
+
+
+class LatencyHistogramTest(unittest.TestCase):
+
+    def test_percentile(self):
+        histogram = LatencyHistogram(buckets=(0.1, 1.0, 10.0, float("inf")))
+        for seconds in [0.05] * 50 + [0.5] * 40 + [5.0] * 9 + [100.0]:
+            histogram.observe(seconds)
+
+        self.assertEqual(histogram.counts, [50, 40, 9, 1], "Latencies are counted in the first bucket they fit in.")
+        self.assertEqual([histogram.percentile(q) for q in (1, 50, 51, 90, 99, 100)],
+                         [0.1, 0.1, 1.0, 1.0, 10.0, float("inf")],
+                         "Percentiles are the upper bound of the bucket holding them.")
+        self.assertAlmostEqual(histogram.mean, (2.5 + 20 + 45 + 100) / 100)
+
+    def test_empty(self):
+        histogram = LatencyHistogram()
+
+        self.assertEqual((histogram.percentile(50), histogram.mean), (0.0, 0.0), "An empty histogram reports 0.")
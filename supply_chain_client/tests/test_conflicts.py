@@ -0,0 +1,46 @@
+import os
+import sys
+import unittest
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+sys.path.insert(0, TOP_DIR)
+sys.path.insert(0, os.path.join(TOP_DIR, 'supply_chain_client'))
+
+from sawtooth_sdk.protobuf.transaction_pb2 import TransactionHeader
+
+from supply_chain_client.conflicts import _overlapping, conflict_report
+
+
+def _header(inputs, outputs):
+    return TransactionHeader(inputs=inputs, outputs=outputs)
+
+
+class ConflictsTest(unittest.TestCase):
+
+    def test_overlapping(self):
+        self.assertEqual(_overlapping(['abc', 'ab', 'abd', 'x'], ['abc']), ['abc', 'ab'],
+                         "Addresses overlap when equal, or when one is a prefix of the other.")
+        self.assertEqual(_overlapping(['a1'], []), [], "Nothing overlaps with no addresses.")
+
+    def test_conflict_report(self):
+        report = conflict_report([
+            _header(['a', 'r'], ['a']),
+            _header(['b', 'r'], ['b']),   # only shares a read with the first one
+            _header(['ab'], ['ab']),      # prefixed by the first one's write
+            _header(['r'], ['r']),        # writes what the first two read
+        ])
+
+        self.assertEqual(report.transactions, 4)
+        self.assertEqual(report.conflicting_transactions, 2,
+                         "Transactions writing what an earlier one reads or writes, or the other way around, conflict.")
+        self.assertEqual(report.conflicting_pairs, 3, "Every conflicting earlier transaction is counted.")
+        self.assertEqual(report.hot_addresses['r'], 2, "The contended addresses are counted.")
+        self.assertEqual(report.conflict_rate, 0.5)
+
+    def test_window(self):
+        headers = [_header(['a'], ['a']), _header(['b'], ['b']), _header(['a'], ['a'])]
+
+        self.assertEqual(conflict_report(headers, window=1).conflicting_transactions, 0,
+                         "Transactions further apart than the window are not compared.")
+        self.assertEqual(conflict_report(headers, window=2).conflicting_transactions, 1)
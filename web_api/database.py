@@ -10,6 +10,13 @@ from models import VALUES_LOOKUP, ReportedValue
 r = RethinkDB()
 r.set_loop_type('asyncio')
 
+# Current-state tables maintained by ledger_sync, by the kind of resource they hold, with their primary keys
+CURRENT_TABLES = {
+    'agents': ('currentAgents', 'public_key'),
+    'record_types': ('currentRecordTypes', 'name'),
+    'records': ('currentRecords', 'record_id'),
+}
+
 
 async def get_table_feed(table_name: str):
     connection = await _get_connection()
@@ -24,51 +31,85 @@ class Database:
 
     def __init__(self):
         self.connection = None
+        self._head_block_num = None
+        self._tracking_head = False
+
+    def track_head_block(self, tracking: bool):
+        """ Turns caching of the head block number on or off. Only turn it on while a blocks change feed is open
+            and passed to block_changed, which keeps the cached number current. """
+        self._tracking_head = tracking
+        self._head_block_num = None
+
+    def block_changed(self, change: dict):
+        """ Updates the cached head block number from a change of the blocks change feed. ledger_sync inserts
+            blocks in order, each after its resources, and deletes all blocks from a fork on. """
+        if not self._tracking_head:
+            return
+        new_block, old_block = change.get('new_val'), change.get('old_val')
+        if new_block is not None:
+            if self._head_block_num is None or new_block['block_num'] > self._head_block_num:
+                self._head_block_num = new_block['block_num']
+        elif old_block is not None and self._head_block_num is not None:
+            if old_block['block_num'] <= self._head_block_num:
+                self._head_block_num = old_block['block_num'] - 1
 
     async def connect(self):
         self.connection = await _get_connection()
 
-    async def get_agents(self):
-        block = await self._current_block_num()
-        return await r.table('agents') \
-            .filter((r.row['start_block_num'] <= block) & (r.row['end_block_num'] >= block)) \
-            .without('delta_id', 'start_block_num', 'end_block_num') \
-            .coerce_to('array').run(self.connection)
+    async def get_agents(self, limit: int = None, after=None):
+        return await self.get_current('agents', limit, after)
 
-    async def get_record_types(self):
-        block = await self._current_block_num()
-        return await r.table('recordTypes') \
-            .filter((r.row['start_block_num'] <= block) & (r.row['end_block_num'] >= block)) \
-            .without('delta_id', 'start_block_num', 'end_block_num') \
-            .coerce_to('array').run(self.connection)
+    async def get_record_types(self, limit: int = None, after=None):
+        return await self.get_current('record_types', limit, after)
 
-    async def get_records(self):
-        block = await self._current_block_num()
-        return await r.table('records') \
-            .filter((r.row['start_block_num'] <= block) & (r.row['end_block_num'] >= block)) \
-            .without('delta_id', 'start_block_num', 'end_block_num') \
-            .coerce_to('array').run(self.connection)
+    async def get_records(self, limit: int = None, after=None):
+        return await self.get_current('records', limit, after)
+
+    async def get_current(self, kind: str, limit: int = None, after=None):
+        """ Reads the current version of the resources of a kind (see CURRENT_TABLES), in primary key order.
+            Returns at most limit resources, with a primary key greater than after. """
+        return await self._current_query(kind, limit, after).coerce_to('array').run(self.connection)
+
+    async def stream_current(self, kind: str):
+        """ Yields the current version of the resources of a kind one at a time, in primary key order, as the
+            database cursor delivers them. """
+        cursor = await self._current_query(kind).run(self.connection)
+        try:
+            async for resource in cursor:
+                yield resource
+        finally:
+            await cursor.close()
+
+    @staticmethod
+    def _current_query(kind: str, limit: int = None, after=None):
+        table_name, primary_key = CURRENT_TABLES[kind]
+        query = r.table(table_name)
+        if after is not None:
+            query = query.between(after, r.maxval, left_bound='open')
+        query = query.order_by(index=primary_key)
+        if limit is not None:
+            query = query.limit(limit)
+        return query.without('delta_id', 'start_block_num', 'end_block_num')
 
     async def get_properties(self, record_id: str):
         block = await self._current_block_num()
         return await r.table('properties') \
-            .filter({'record_id': record_id}) \
+            .between([record_id, r.minval, r.minval], [record_id, r.maxval, r.maxval], index='record_name_end') \
             .filter((r.row['start_block_num'] <= block) & (r.row['end_block_num'] >= block)) \
             .without('delta_id', 'start_block_num', 'end_block_num') \
             .coerce_to('array').run(self.connection)
 
     async def get_property(self, record_id: str, property_name: str):
         block = await self._current_block_num()
-        prop = await r.table('properties') \
-            .filter({'name': property_name, 'record_id': record_id}) \
-            .filter((r.row['start_block_num'] <= block) & (r.row['end_block_num'] >= block)) \
-            .max('start_block_num') \
-            .without('delta_id', 'start_block_num', 'end_block_num') \
-            .run(self.connection)
-
         try:
-            return prop
-        except IndexError:
+            return await r.table('properties') \
+                .between([record_id, property_name, block], [record_id, property_name, r.maxval],
+                         index='record_name_end') \
+                .filter(r.row['start_block_num'] <= block) \
+                .max('start_block_num') \
+                .without('delta_id', 'start_block_num', 'end_block_num') \
+                .run(self.connection)
+        except ReqlNonExistenceError:
             raise HTTPException(
                 status_code=404, detail=f'Property ({property_name}) or record_id ({record_id}) not found.')
 
@@ -84,30 +125,29 @@ class Database:
 
         block = await self._current_block_num()
 
-        resp = await r.table('propertyPages') \
-            .filter({
-                'record_id': record_id,
-                'name': property_name,
-                'page_num': page_num
-            }) \
-            .filter((r.row['start_block_num'] <= block) & (r.row['end_block_num'] >= block)) \
-            .max('start_block_num') \
-            .without('delta_id', 'start_block_num', 'end_block_num') \
-            .without(excludes) \
-            .coerce_to('array') \
-            .run(self.connection)
-
         try:
-            return resp
-        except IndexError:
+            return await r.table('propertyPages') \
+                .between([record_id, property_name, page_num, block], [record_id, property_name, page_num, r.maxval],
+                         index='record_name_page_end') \
+                .filter(r.row['start_block_num'] <= block) \
+                .max('start_block_num') \
+                .without('delta_id', 'start_block_num', 'end_block_num') \
+                .without(excludes) \
+                .coerce_to('array') \
+                .run(self.connection)
+        except ReqlNonExistenceError:
             raise HTTPException(status_code=404, detail=f"Page {page_num} not found.")
 
     async def _current_block_num(self):
+        if self._tracking_head and self._head_block_num is not None:
+            return self._head_block_num
         try:
             block = await r.table('blocks') \
-                .max('block_num') \
+                .max(index='block_num') \
                 .without('block_id') \
                 .run(self.connection)
+            if self._tracking_head and self._head_block_num is None:
+                self._head_block_num = block['block_num']
             return block['block_num']
         except ReqlNonExistenceError:
             raise HTTPException(
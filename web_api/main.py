@@ -1,12 +1,16 @@
 import asyncio
-from typing import List
+import base64
+import binascii
+import json
+from typing import List, Optional
 
-from database import get_table_feed, Database
+from database import get_table_feed, Database, CURRENT_TABLES
 from models import Agent, RecordType, Record, Property, PropertyPage, NotFound
 from websocket_manager import WebSocketManager
 
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect
+from fastapi import FastAPI, HTTPException, Query, Response, WebSocket, WebSocketDisconnect
+from fastapi.responses import StreamingResponse
 
 
 app = FastAPI(
@@ -17,20 +21,79 @@ manager = WebSocketManager()
 updates_queue = asyncio.Queue()
 background_tasks = []  # A reference needs to be kept, or tasks die
 
+MAX_PAGE_SIZE = 1000
+# Response header holding the cursor of the next page, when there may be one
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+LIMIT_QUERY = Query(None, ge=1, le=MAX_PAGE_SIZE, description="Page size. Without it, everything is returned.")
+CURSOR_QUERY = Query(None, description=f"The {NEXT_CURSOR_HEADER} header of the previous page.")
+
+
+def _encode_cursor(key) -> str:
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+
+def _decode_cursor(cursor: Optional[str]):
+    if cursor is None:
+        return None
+    try:
+        key = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (binascii.Error, ValueError):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    # Cursors hold a primary key; anything else would fail in the query
+    if isinstance(key, bool) or not isinstance(key, (str, int, float)):
+        raise HTTPException(status_code=400, detail="Invalid cursor.")
+    return key
+
+
+async def _current_page(kind: str, response: Response, limit: Optional[int], cursor: Optional[str]):
+    """ Returns a page of the current resources of a kind, and sets the next page's cursor on the response. """
+    page = await db.get_current(kind, limit, _decode_cursor(cursor))
+    if limit is not None and len(page) == limit:
+        _, primary_key = CURRENT_TABLES[kind]
+        response.headers[NEXT_CURSOR_HEADER] = _encode_cursor(page[-1][primary_key])
+    return page
+
+
+def _ndjson_stream(kind: str) -> StreamingResponse:
+    async def lines():
+        async for resource in db.stream_current(kind):
+            yield json.dumps(resource) + "\n"
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
 
 @app.get("/agents", response_model=List[Agent])
-async def agents():
-    return await db.get_agents()
+async def agents(response: Response, limit: Optional[int] = LIMIT_QUERY, cursor: Optional[str] = CURSOR_QUERY):
+    return await _current_page("agents", response, limit, cursor)
+
+
+@app.get("/agents/stream", response_class=StreamingResponse)
+async def agents_stream():
+    """ All agents as newline delimited JSON, streamed as they are read. """
+    return _ndjson_stream("agents")
 
 
 @app.get("/record_types", response_model=List[RecordType])
-async def record_types():
-    return await db.get_record_types()
+async def record_types(response: Response, limit: Optional[int] = LIMIT_QUERY,
+                       cursor: Optional[str] = CURSOR_QUERY):
+    return await _current_page("record_types", response, limit, cursor)
+
+
+@app.get("/record_types/stream", response_class=StreamingResponse)
+async def record_types_stream():
+    """ All record types as newline delimited JSON, streamed as they are read. """
+    return _ndjson_stream("record_types")
 
 
 @app.get("/records", response_model=List[Record])
-async def records():
-    return await db.get_records()
+async def records(response: Response, limit: Optional[int] = LIMIT_QUERY, cursor: Optional[str] = CURSOR_QUERY):
+    return await _current_page("records", response, limit, cursor)
+
+
+@app.get("/records/stream", response_class=StreamingResponse)
+async def records_stream():
+    """ All records as newline delimited JSON, streamed as they are read. """
+    return _ndjson_stream("records")
 
 
 @app.get(
@@ -70,6 +133,19 @@ async def table_change_task(table):
         await updates_queue.put({"updated_table": table, **change})
 
 
+async def head_block_task():
+    """ Broadcasts block changes like table_change_task, and keeps the head block number cached by db current. """
+    feed = await get_table_feed("blocks")
+    db.track_head_block(True)
+    try:
+        while await feed.fetch_next():
+            change = await feed.next()
+            db.block_changed(change)
+            await updates_queue.put({"updated_table": "blocks", **change})
+    finally:
+        db.track_head_block(False)
+
+
 async def change_broadcaster_task():
     while True:
         change = await updates_queue.get()
@@ -79,7 +155,7 @@ async def change_broadcaster_task():
 
 @app.on_event("startup")
 async def tasks_setup():
-    background_tasks.append(asyncio.create_task(table_change_task("blocks")))
+    background_tasks.append(asyncio.create_task(head_block_task()))
     background_tasks.append(asyncio.create_task(table_change_task("agents")))
     background_tasks.append(asyncio.create_task(table_change_task("recordTypes")))
     background_tasks.append(asyncio.create_task(change_broadcaster_task()))
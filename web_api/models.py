@@ -33,6 +33,8 @@ class PropertySchema(BaseModel):
     enum_options: Optional[List[str]]
     struct_properties: Optional[List['PropertySchema']]
     unit: Optional[str]
+    page_size: int = 0
+    page_count: int = 0
 
 
 PropertySchema.update_forward_refs()
@@ -69,6 +71,8 @@ class Property(BaseModel):
     enum_options: Optional[List[str]]
     struct_properties: Optional[List[PropertySchema]]
     unit: Optional[str]
+    page_size: int = 0
+    page_count: int = 0
 
 
 Property.update_forward_refs()
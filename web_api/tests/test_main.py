@@ -0,0 +1,85 @@
+import base64
+import json
+import os
+import sys
+import unittest
+
+TOP_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.realpath(__file__))))
+
+sys.path.insert(0, os.path.join(TOP_DIR, 'web_api'))
+
+from fastapi import HTTPException
+from fastapi.testclient import TestClient
+
+from database import Database
+from main import app, _decode_cursor, _encode_cursor
+
+
+def _block(block_num):
+    return {'block_num': block_num, 'block_id': f"block-{block_num}"}
+
+
+class BlockChangedTest(unittest.TestCase):
+    """ Feeds changes of the blocks change feed, as ledger_sync makes them, to Database.block_changed. """
+
+    def setUp(self):
+        self.db = Database()
+        self.db.track_head_block(True)
+
+    def test_inserts(self):
+        self.db.block_changed({'new_val': _block(1), 'old_val': None})
+        self.db.block_changed({'new_val': _block(2), 'old_val': None})
+
+        self.assertEqual(self.db._head_block_num, 2, "Inserted blocks become the head block.")
+
+    def test_fork(self):
+        for block_num in range(1, 6):
+            self.db.block_changed({'new_val': _block(block_num), 'old_val': None})
+
+        # Blocks from a fork on are deleted in any order
+        for block_num in (5, 3, 4):
+            self.db.block_changed({'new_val': None, 'old_val': _block(block_num)})
+
+        self.assertEqual(self.db._head_block_num, 2, "The head is the block before the first deleted one.")
+
+        self.db.block_changed({'new_val': _block(3), 'old_val': None})
+        self.assertEqual(self.db._head_block_num, 3, "Blocks of the new fork become the head block.")
+
+    def test_unknown_head(self):
+        self.db.block_changed({'new_val': None, 'old_val': _block(3)})
+
+        self.assertIsNone(self.db._head_block_num, "Deletes do not set a head that is not known yet.")
+
+        self.db.block_changed({'new_val': _block(3), 'old_val': None})
+        self.assertEqual(self.db._head_block_num, 3, "The first inserted block sets the head.")
+
+    def test_not_tracking(self):
+        self.db.track_head_block(False)
+        self.db.block_changed({'new_val': _block(1), 'old_val': None})
+
+        self.assertIsNone(self.db._head_block_num, "Nothing is cached without a blocks change feed.")
+
+
+class CursorTest(unittest.TestCase):
+
+    def test_round_trip(self):
+        for key in ["record-1", "ünïcode/+?", 42]:
+            self.assertEqual(_decode_cursor(_encode_cursor(key)), key, "Cursors decode to the key they were made of.")
+
+        self.assertIsNone(_decode_cursor(None), "Without a cursor, pages start at the beginning.")
+
+    def test_invalid(self):
+        for cursor in ["not base64!", base64.urlsafe_b64encode(b"not json").decode(),
+                       _encode_cursor({'record_id': "record-1"}), _encode_cursor(["record-1"]),
+                       _encode_cursor(None), _encode_cursor(True)]:
+            with self.assertRaises(HTTPException) as raised:
+                _decode_cursor(cursor)
+            self.assertEqual(raised.exception.status_code, 400, f"{cursor} is rejected as a bad request.")
+
+    def test_invalid_request(self):
+        client = TestClient(app)
+
+        for cursor in ["not base64!", _encode_cursor({'record_id': "record-1"})]:
+            response = client.get("/records", params={'limit': 10, 'cursor': cursor})
+            self.assertEqual(response.status_code, 400, "Invalid cursors are rejected before querying the database.")
+